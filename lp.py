@@ -0,0 +1,56 @@
+'''
+NAME:           lp.py
+AUTHOR:         AquaDragon
+DATE:           18 Oct 2026
+DESCRIPTION:    Single entry point for the bot scripts. Only the module of
+                the command being run is imported, and pywikibot only once
+                that command talks to the wiki (see lp_lazy.py), so --help
+                and offline commands start without loading pywikibot.
+
+USAGE:          python lp.py league-cup --dry-run
+                python lp.py offline update_player_page ./pages -j 4
+                python lp.py <command> --help
+'''
+import argparse
+import importlib
+import sys
+
+# command: (module with a main(argv), what it does)
+COMMANDS = {
+    'players': ('update_player_page', 'clean up player pages'),
+    'results': ('update_results_page', 'clean up player results pages'),
+    'league-cup': ('update_league_cup', 'clean up League Cup pages'),
+    'all': ('update_all', 'clean up player, results and League Cup pages '
+                          'in one pass'),
+    'move': ('move_lc_pages', 'plan and carry out League Cup page moves'),
+    'sprites': ('upload_sprites', 'upload Pokémon sprites to commons'),
+    'offline': ('lp_rules', 'run a cleanup on local wikitext files'),
+    'dump': ('lp_dump', 'find the pages a cleanup would change in a dump'),
+    'bench': ('lp_bench', 'benchmark the cleanup rules'),
+    }
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    parser = argparse.ArgumentParser(
+        prog='lp.py', description='Liquipedia bot scripts.',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='commands:\n' + '\n'.join(
+            '  {0:<12}{1}'.format(command, text)
+            for command, (_, text) in COMMANDS.items()))
+    parser.add_argument('command', choices=list(COMMANDS), metavar='command',
+                        help='see below')
+    parser.add_argument('args', nargs='*',
+                        help='options of the command, see lp.py <command> '
+                             '--help')
+    # Everything after the command belongs to it, --help included
+    args = parser.parse_args(argv[:1])
+
+    module, _ = COMMANDS[args.command]
+    sys.argv[0] = 'lp.py ' + args.command
+    importlib.import_module(module).main(argv[1:])
+
+
+if __name__ == '__main__':
+    main()
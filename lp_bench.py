@@ -0,0 +1,292 @@
+'''
+NAME:           lp_bench.py
+AUTHOR:         AquaDragon
+DATE:           18 Oct 2026
+DESCRIPTION:    Benchmark for the cleanup rules. Generates a synthetic corpus
+                of player, results and League Cup pages, runs each script's
+                rules on it offline and reports throughput and peak memory.
+                The corpus is the same for the same --seed, so numbers from
+                two versions of the rules can be compared.
+
+USAGE:          python lp_bench.py [-n 500] [--rows 40] [--json out.json]
+                python lp_bench.py --baseline out.json   # flag regressions
+'''
+import argparse
+import importlib
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+import lp_log
+import lp_rules
+
+# Share of pages generated as one of the pathological cases below
+PATHOLOGICAL = 0.05
+
+# Slowdown against --baseline that counts as a regression
+TOLERANCE = 0.2
+
+NAMES = ['Ash', 'Misty', 'Brock', 'Dawn', 'Gary', 'Serena', 'Cynthia',
+         'Leon', 'Marnie', 'Hop', 'Iris', 'Cilan', 'Lillie', 'Hau']
+COUNTRIES = ['United States', 'Canada', 'Japan', 'Germany', 'Brazil',
+             'United Kingdom', 'Australia', 'Mexico']
+CITIES = ['Anaheim, California', 'Toronto, Ontario', 'Berlin', 'Osaka',
+          'Sao Paulo', 'London', 'Melbourne', 'Dallas, Texas']
+
+
+def _date(rng):
+    return '20{0:02d}-{1:02d}-{2:02d}'.format(rng.randint(15, 21),
+                                             rng.randint(1, 12),
+                                             rng.randint(1, 28))
+
+
+def _space(rng):
+    # Trailing whitespace on some lines, like pages edited by hand
+    return rng.choice(['', '', '', ' ', '   ', '\t'])
+
+
+def _tabs(rng, name):
+    count = rng.choice([2, 3])
+    lines = ['{{Tabs static']
+    for i, (tab, link) in enumerate([('Overview', name),
+                                     ('Results', name + '/Results'),
+                                     ('Broadcasts', name + '/Broadcasts')]
+                                    [:count], 1):
+        lines.append('|name{0}={1}'.format(i, tab))
+        lines.append('|link{0}={1}'.format(i, link))
+    lines.append('}}')
+    return '\n'.join(lines)
+
+
+def player_page(rng, title, rows):
+    '''A player page: tabs, infobox with social fields, a short bio.'''
+    name = title
+    lines = []
+    if rng.random() < 0.5:
+        lines.append('{{{{DISPLAYTITLE:{0}}}}}'.format(name))
+    if rng.random() < 0.7:
+        lines.append(_tabs(rng, name))
+    lines.append('{{Infobox player')
+    lines.append('|id={0}{1}'.format(name, _space(rng)))
+    lines.append(' |name={0} {1}'.format(name, rng.choice(NAMES)))
+    lines.append('|country={0}'.format(rng.choice(COUNTRIES)))
+    if rng.random() < 0.6:
+        lines.append('|games_played={0}'.format(rng.choice(['', 'VGC',
+                                                            'TCG'])))
+    for field, prefix in [('twitter', 'https://twitter.com/'),
+                          ('youtube', 'https://www.youtube.com/'),
+                          ('twitch', 'https://www.twitch.tv/')]:
+        if rng.random() < 0.5:
+            lines.append('|{0}={1}{2}'.format(
+                field, prefix if rng.random() < 0.5 else '', name.lower()))
+    lines.append('}}')
+    lines.append('\n')
+    lines.append("{0} is a Pokémon {1} player from {2}.{3}".format(
+        name, rng.choice(['VGC', 'TCG']), rng.choice(COUNTRIES), _space(rng)))
+    for i in range(rows // 10):
+        lines.append('\n==Section {0}==\n{1} won a tournament.{2}'.format(
+            i, name, _space(rng)))
+    if rng.random() < 0.5:
+        lines.append('\n==References==\n{{Reflist}}')
+    lines.append('[[Category:Players]]')
+    return '\n'.join(lines)
+
+
+def results_page(rng, title, rows):
+    '''A player results page with a results table of rows rows.'''
+    name = title.split('/')[0]
+    lines = []
+    if rng.random() < 0.3:
+        lines.append('__NOTOC__')
+    lines.append(_tabs(rng, name))
+    if rng.random() < 0.5:
+        lines.append('{{{{DISPLAYTITLE:{0}}}}}'.format(name))
+    lines.append('\n\n==Detailed Results==')
+    lines.append('{{Player results table start}}')
+    for _ in range(rows):
+        lines.append(' {{{{Player results table row|date={0}|place={1}|'
+                     'tier={2}|tournament=League Cup {3}|prize=${4}}}}}{5}'.
+                     format(_date(rng), rng.randint(1, 64),
+                            rng.randint(1, 4), rng.choice(CITIES),
+                            rng.randint(0, 5000), _space(rng)))
+    lines.append('{{Player results table end}}')
+    return '\n'.join(lines)
+
+
+def league_cup_page(rng, title, rows):
+    '''A League Cup page: infobox, sections, Swiss table and prize pool.'''
+    loc = title.split('/')[1]
+    country = rng.choice(COUNTRIES)
+    date = _date(rng)
+    name = '{0} League Cup - {1} {2}'.format(date[:4], loc, date)
+    lines = ['{{Infobox league',
+             '|name={0}'.format(name)]
+    if rng.random() < 0.5:
+        lines.append('|shortname={0}'.format(name))
+    if rng.random() < 0.3:
+        lines.append('|tickername={0}'.format(name))
+    lines.extend(['|country={0}'.format(country),
+                  '|city={0}{1}'.format(loc.split(',')[0], _space(rng)),
+                  '|date={0}'.format(date),
+                  '|game={0}'.format(rng.choice(['tcg', 'TCG'])),
+                  '|format=Swiss',
+                  '|liquipediatier={0}'.format(rng.choice(['Weekly', '3'])),
+                  '}}', '',
+                  '==Format==',
+                  'Swiss rounds followed by a top cut.',
+                  '===Swiss Results===',
+                  '{{Swiss table/start|rounds=0}}'])
+    for place in range(1, rows + 1):
+        lines.append('{{{{Swiss table/row|place={0}|flag=us|{1}|win_m={2}|'
+                     'lose_m={3}|tie_m={4}|opw%={5:.1f}%|oopw%={6:.1f}%}}}}'.
+                     format(place, rng.choice(NAMES), rng.randint(0, 6),
+                            rng.randint(0, 6), rng.randint(0, 2),
+                            rng.uniform(30, 80), rng.uniform(30, 80)))
+    lines.append('{{Swiss table/end}}')
+    lines.append('==Prize Pool==')
+    for place in range(1, min(rows, 16) + 1):
+        lines.append('{{{{prize pool slot|place={0}|localprize={1} CP '
+                     '|localcurrency=points}}}}'.format(place,
+                                                        rng.randint(1, 500)))
+    return '\n'.join(lines)
+
+
+def pathological_page(rng, title, rows):
+    '''Malformed or oversized text the rules must still get through.'''
+    case = rng.choice(['unclosed', 'nested', 'whitespace', 'newlines',
+                       'braces', 'long_line'])
+    if case == 'unclosed':
+        # Templates that never close, in the middle of a large page
+        return '{{Infobox player\n|id=' + title + '\n' + \
+               '{{Tabs static\n|name1=x\n' * rows * 10
+    if case == 'nested':
+        return '{{Infobox league\n|name=' + '{{x|' * rows * 5 + \
+               '}}' * rows * 5 + '\n}}'
+    if case == 'whitespace':
+        return 'text' + ' ' * rows * 1000 + '\nmore' + '\t \n' * rows * 50
+    if case == 'newlines':
+        return '{{Infobox player\n|id=x\n}}' + '\n \n' * rows * 500
+    if case == 'braces':
+        return '}}{{|' * rows * 200
+    return '|place=1|flag=us|' * rows * 50 + '\n'
+
+
+CORPORA = {
+    'update_player_page': ('{0}{1}', player_page),
+    'update_results_page': ('{0}{1}/Results', results_page),
+    'update_league_cup': ('Pokemon League Cup/{2}/{1:02d}-01-20',
+                          league_cup_page),
+    }
+
+
+def corpus(script, pages, rows, seed=0, pathological=PATHOLOGICAL):
+    '''[(title, text)] for script, the same for the same arguments.'''
+    pattern, make = CORPORA[script]
+    rng = random.Random('{0}:{1}'.format(seed, script))
+    result = []
+    for i in range(pages):
+        title = pattern.format(rng.choice(NAMES), i, rng.choice(CITIES))
+        if rng.random() < pathological:
+            result.append((title, pathological_page(rng, title, rows)))
+        else:
+            result.append((title, make(rng, title, rows)))
+    return result
+
+
+def bench(script, pages):
+    '''Run script's rules on pages, return the measurements.'''
+    rules = importlib.import_module(script).RULES
+    titles = {title for title, _ in pages}
+    size = sum(len(text.encode('utf-8')) for _, text in pages)
+
+    # Time and memory are taken in separate runs, tracemalloc slows the
+    # rules down
+    start = time.perf_counter()
+    changed = sum(1 for _ in lp_rules.run_offline(rules, pages,
+                                                  titles.__contains__,
+                                                  budget=None))
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    for _ in lp_rules.run_offline(rules, pages, titles.__contains__,
+                                  budget=None):
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {'pages': len(pages), 'changed': changed,
+            'mb': round(size / 1e6, 3),
+            'seconds': round(elapsed, 3),
+            'pages_per_s': round(len(pages) / elapsed, 1) if elapsed else 0,
+            'mb_per_s': round(size / 1e6 / elapsed, 3) if elapsed else 0,
+            'peak_mb': round(peak / 1e6, 3)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark the cleanup rules on a synthetic corpus.')
+    parser.add_argument('scripts', nargs='*', default=list(CORPORA),
+                        help='scripts to run (default all)')
+    parser.add_argument('-n', '--pages', type=int, default=500,
+                        help='pages per script')
+    parser.add_argument('--rows', type=int, default=40,
+                        help='table rows per page, scales the page size')
+    parser.add_argument('--pathological', type=float, default=PATHOLOGICAL,
+                        help='share of malformed pages')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--write', metavar='DIR',
+                        help='also write the corpus as .wiki files')
+    parser.add_argument('--json', metavar='FILE',
+                        help='write the results to FILE')
+    parser.add_argument('--baseline', metavar='FILE',
+                        help='compare with results written by --json')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help='slowdown against the baseline that fails')
+    args = parser.parse_args(argv)
+    # The random standings would fill the output with Swiss table warnings
+    lp_log.errors_only()
+
+    results = {}
+    for script in args.scripts:
+        pages = corpus(script, args.pages, args.rows, args.seed,
+                       args.pathological)
+        if args.write:
+            path = os.path.join(args.write, script)
+            os.makedirs(path, exist_ok=True)
+            for title, text in pages:
+                with open(os.path.join(path,
+                                       lp_rules.title_to_filename(title)),
+                          'w', encoding='utf-8') as f:
+                    f.write(text)
+        results[script] = result = bench(script, pages)
+        print('{0}: {1} pages ({2} MB), {3} changed, {4} pages/s, '
+              '{5} MB/s, peak {6} MB'.format(
+                  script, result['pages'], result['mb'], result['changed'],
+                  result['pages_per_s'], result['mb_per_s'],
+                  result['peak_mb']))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'args': vars(args), 'results': results}, f, indent=1)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        regressed = False
+        for script, result in results.items():
+            if script not in baseline:
+                continue
+            before = baseline[script]['pages_per_s']
+            change = result['pages_per_s'] / before - 1 if before else 0
+            print('!! {0}: {1:+.0%} pages/s against baseline'.format(
+                script, change))
+            regressed |= change < -args.tolerance
+        if regressed:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
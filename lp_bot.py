@@ -0,0 +1,212 @@
+'''
+NAME:           lp_bot.py
+AUTHOR:         AquaDragon
+DATE:           18 Oct 2026
+DESCRIPTION:    Live runner for the cleanup scripts. Applies a list of rules
+                (see lp_rules.py) to wiki pages and saves the ones that
+                changed. main() is the command line the scripts share.
+'''
+import argparse
+import datetime
+import functools
+import itertools
+import time
+
+import lp_cache
+import lp_checkpoint
+import lp_dump
+import lp_log
+import lp_pages
+import lp_rules
+import lp_save
+import lp_stats
+import lp_throttle
+
+# Seconds of recent changes covered by the first watch run
+WATCH_SINCE = 24 * 60 * 60
+
+
+def run(rules, pages, budget=lp_rules.BUDGET, groupsize=lp_pages.GROUPSIZE,
+        pipeline=False, checkpoint=None, dry_run=False):
+    '''Clean up pages with rules, a list of rules or a lp_rules.RuleSets.
+    With pipeline, pages are saved by a writer thread (see lp_save.py)
+    while the following pages are cleaned up. With a checkpoint (see
+    lp_checkpoint.py), every page is recorded once it has been handled so
+    the next run can skip it. With dry_run, nothing is saved or
+    recorded in the checkpoint; the edits only go to the log and the run
+    statistics.'''
+    cache = None
+    if dry_run:
+        pipeline = False
+        checkpoint = None
+    saves = lp_save.SaveQueue() if pipeline else None
+
+    try:
+        for batch in lp_pages.batches(pages, groupsize):
+            # Check every page the rules will ask about for this batch at
+            # once
+            if cache is None:
+                cache = lp_cache.ExistenceCache(
+                    functools.partial(lp_pages.exists_many, batch[0].site))
+            cache.prefetch([title for page in batch for title in
+                            lp_rules.prefetch_titles(rules, page.title(),
+                                                     page.text)])
+
+            # Edit individual pages
+            for page in batch:
+                edit(rules, page, cache.exists, budget, saves, checkpoint,
+                     dry_run)
+    finally:
+        if saves is not None:
+            saves.close()
+            saves.report()
+
+
+def watch(rules, site, category, checkpoint, interval=None,
+          since=WATCH_SINCE, **kwargs):
+    '''Clean up only the pages of category changed since the last watch
+    run, or in the last since seconds on the first one. With interval,
+    keep polling every interval seconds. Other arguments go to run().'''
+    while True:
+        # Take the time before reading the changes so that edits made
+        # while this round runs are picked up by the next one
+        now = site.server_time()
+        last = checkpoint.since()
+        if last is None:
+            last = (now - datetime.timedelta(seconds=since)).isoformat()
+        lp_log.logger.info('Pages changed since %s', last)
+        run(rules, lp_pages.recent_pages(site, category, last),
+            checkpoint=checkpoint, **kwargs)
+        checkpoint.watched(now.isoformat())
+
+        if interval is None:
+            return
+        time.sleep(interval)
+
+
+def transform(rules, page, exists, budget=lp_rules.BUDGET):
+    '''(text, edit summary) for page, or None if nothing changes. Raises
+    lp_rules.BudgetExceeded if the rules take too long.'''
+    ctx = lp_rules.Context(page.title(), page.text, exists=exists)
+    text, edits = lp_rules.apply(rules, page.text, ctx, budget)
+    if text == page.text:
+        return None
+    # Rules from several scripts may describe their edits the same way
+    return text, ', '.join(dict.fromkeys(edits))
+
+
+def _redo(rules, page, exists, budget):
+    # transform() for the save queue, after an edit conflict
+    try:
+        result = transform(rules, page, exists, budget)
+    except (lp_rules.BudgetExceeded, lp_rules.RuleError) as err:
+        lp_log.skipped(page.title(), err)
+        return None
+    if result is not None:
+        lp_log.edit(page.title(), page.text, *result)
+    return result
+
+
+def edit(rules, page, exists, budget=lp_rules.BUDGET, saves=None,
+         checkpoint=None, dry_run=False):
+    try:
+        with lp_stats.STATS.page():
+            result = transform(rules, page, exists, budget)
+    except (lp_rules.BudgetExceeded, lp_rules.RuleError) as err:
+        # Not recorded as applied, so the next run tries it again
+        lp_log.skipped(page.title(), err)
+        _done(checkpoint, page, False, saves)
+        return
+
+    # Check if any changes to be made to the page
+    if result is None:
+        lp_log.unchanged(page.title())
+        _done(checkpoint, page, True, saves)
+        return
+    text, edit_summary = result
+
+    lp_log.edit(page.title(), page.text, text, edit_summary)
+    lp_stats.STATS.edited(page.text, text)
+    if dry_run:
+        return
+
+    # Save page with edit summary
+    if saves is not None:
+        done = None
+        if checkpoint is not None:
+            done = functools.partial(checkpoint.done, page)
+        saves.put(page, text, edit_summary,
+                  redo=functools.partial(_redo, rules, page, exists, budget),
+                  done=done)
+    else:
+        page.text = text
+        with lp_throttle.write(page.site, 'save'):
+            page.save(edit_summary)
+        _done(checkpoint, page, True)
+
+
+def _done(checkpoint, page, applied, saves=None):
+    # Record page in the checkpoint. With a save queue this waits for the
+    # pages queued before it, so the checkpoint never gets ahead of the
+    # saves.
+    if checkpoint is None:
+        return
+    if saves is not None:
+        saves.call(functools.partial(checkpoint.done, page, applied))
+    else:
+        checkpoint.done(page, applied)
+
+
+def main(name, category, rules, argv=None, keep=None, watch=True,
+         description=None):
+    '''Command line of a cleanup script called name: run rules on the
+    pages of category, or on the pages listed by lp_dump.py with --titles.
+    With keep, a full run stops at the first page keep(page) is false for.
+    watch adds --watch and --interval, see watch() above.'''
+    parser = argparse.ArgumentParser(description=description)
+    if watch:
+        parser.add_argument('--watch', action='store_true',
+                            help='only pages changed since the last --watch '
+                                 'run')
+        parser.add_argument('--interval', type=float, metavar='MINUTES',
+                            help='with --watch, keep polling every MINUTES')
+    parser.add_argument('--titles', metavar='FILE',
+                        help='only the pages listed by lp_dump.py')
+    parser.add_argument('-n', '--dry-run', action='store_true',
+                        help='save nothing, only log the edits and report '
+                             'what would change')
+    lp_stats.add_arguments(parser)
+    lp_log.add_arguments(parser)
+    args = parser.parse_args(argv)
+    if watch and args.watch and args.dry_run:
+        # A watch run moves its checkpoint on
+        parser.error('--dry-run cannot be used with --watch')
+    lp_log.setup(name, args)
+
+    site = lp_pages.get_site()
+    with lp_stats.reporting(args):
+        if args.titles:
+            run(rules, lp_pages.titled_pages(
+                site, lp_dump.read_titles(args.titles)),
+                pipeline=True, dry_run=args.dry_run)
+        elif watch and args.watch:
+            _watch(name, rules, site, category,
+                   args.interval and args.interval * 60)
+        else:
+            checkpoint = None if args.dry_run else \
+                lp_checkpoint.Checkpoint(name, rules)
+            pages = lp_pages.category_pages(site, category, start='',
+                                            checkpoint=checkpoint)
+            if keep is not None:
+                pages = itertools.takewhile(keep, pages)
+            run(rules, pages, pipeline=True, checkpoint=checkpoint,
+                dry_run=args.dry_run)
+
+
+def _watch(name, rules, site, category, interval):
+    # main() --watch; main's watch argument hides watch() there. The pages
+    # cleaned up are shared with full runs, the time of the last watch run
+    # is kept under its own name.
+    checkpoint = lp_checkpoint.Checkpoint(name + ' --watch', rules)
+    watch(rules, site, category, checkpoint, interval=interval,
+          pipeline=True)
@@ -0,0 +1,138 @@
+'''
+NAME:           lp_cache.py
+AUTHOR:         AquaDragon
+DATE:           18 Oct 2026
+DESCRIPTION:    Local caches shared by the bot scripts, kept in memory and
+                saved under ./cache so reruns can reuse them.
+'''
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+
+# Seconds an existence check stays valid
+EXISTS_TTL = 24 * 60 * 60
+
+# Bytes of compressed page text kept before the least recently used pages
+# are dropped
+TEXT_SIZE = 200 * 1024 * 1024
+
+
+def write_json(path, data, indent=None):
+    '''Save data as JSON at path, creating its directory.'''
+    # Write to a temporary file first so a crash never leaves half a file
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temp = path + '.tmp'
+    with open(temp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+    os.replace(temp, path)
+
+
+class ExistenceCache:
+    '''Whether pages exist, keyed by title.
+
+    lookup(titles) must return {title: bool} for a list of titles; it is
+    only called for titles that are missing or older than ttl seconds.
+    The rules also run on the save queue's writer thread (after an edit
+    conflict), so the entries and the file are guarded by a lock.
+    '''
+
+    def __init__(self, lookup, path=None, ttl=EXISTS_TTL):
+        self.lookup = lookup
+        self.path = path or os.path.join(CACHE_DIR, 'exists.json')
+        self.ttl = ttl
+        self.entries = {}
+        self.lock = threading.Lock()
+        if os.path.exists(self.path):
+            with open(self.path, encoding='utf-8') as f:
+                self.entries = json.load(f)
+
+    def _fresh(self, title):
+        entry = self.entries.get(title)
+        return entry is not None and time.time() - entry[1] < self.ttl
+
+    def prefetch(self, titles):
+        '''Look up every stale title in titles with a single lookup call.'''
+        with self.lock:
+            missing = sorted({title for title in titles
+                              if not self._fresh(title)})
+        if not missing:
+            return
+        # The lookup is an API request, the other thread need not wait
+        now = time.time()
+        found = self.lookup(missing)
+        with self.lock:
+            for title, exists in found.items():
+                self.entries[title] = [exists, now]
+            write_json(self.path, self.entries)
+
+    def exists(self, title):
+        with self.lock:
+            fresh = self._fresh(title)
+        if not fresh:
+            self.prefetch([title])
+        with self.lock:
+            return self.entries[title][0]
+
+
+class TextCache:
+    '''Page text keyed by title and revision ID, shared by all scripts.
+
+    Texts are stored zlib-compressed in SQLite, one revision per title.
+    Once they take more than max_size bytes, the least recently used ones
+    are dropped. Nothing here is precious, so writes are not synced.
+    '''
+
+    def __init__(self, path=None, max_size=TEXT_SIZE):
+        self.path = path or os.path.join(CACHE_DIR, 'text.sqlite')
+        self.max_size = max_size
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        # Pages are preloaded in a background thread
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.db:
+            self.db.execute('PRAGMA synchronous=OFF')
+            self.db.execute('CREATE TABLE IF NOT EXISTS texts ('
+                            'title TEXT PRIMARY KEY, revid INTEGER, '
+                            'data BLOB, used REAL)')
+            self.size = self.db.execute('SELECT COALESCE(SUM(LENGTH(data)), '
+                                        '0) FROM texts').fetchone()[0]
+
+    def get(self, title, revid):
+        '''Text of revision revid of title, or None if it is not cached.'''
+        with self.lock, self.db:
+            row = self.db.execute('SELECT data FROM texts WHERE title=? AND '
+                                  'revid=?', (title, revid)).fetchone()
+            if row is None:
+                return None
+            self.db.execute('UPDATE texts SET used=? WHERE title=?',
+                            (time.time(), title))
+        return zlib.decompress(row[0]).decode('utf-8')
+
+    def put(self, title, revid, text):
+        data = zlib.compress(text.encode('utf-8'))
+        with self.lock, self.db:
+            row = self.db.execute('SELECT LENGTH(data) FROM texts WHERE '
+                                  'title=?', (title,)).fetchone()
+            if row is not None:
+                self.size -= row[0]
+            self.db.execute('INSERT OR REPLACE INTO texts VALUES (?, ?, ?, ?)',
+                            (title, revid, data, time.time()))
+            self.size += len(data)
+            if self.size > self.max_size:
+                self._evict()
+
+    def _evict(self):
+        # Drop down to 90% so every put after this does not evict again
+        rows = self.db.execute('SELECT title, LENGTH(data) FROM texts '
+                               'ORDER BY used').fetchall()
+        for title, size in rows:
+            if self.size <= self.max_size * 0.9:
+                break
+            self.db.execute('DELETE FROM texts WHERE title=?', (title,))
+            self.size -= size
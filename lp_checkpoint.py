@@ -0,0 +1,73 @@
+'''
+NAME:           lp_checkpoint.py
+AUTHOR:         AquaDragon
+DATE:           18 Oct 2026
+DESCRIPTION:    Checkpoint store for resumable runs. Records which revision
+                of each page was last cleaned up by which version of the
+                rules, so reruns after a crash or on a schedule skip pages
+                that have not changed.
+'''
+import os
+import sqlite3
+import threading
+
+import lp_cache
+import lp_rules
+
+
+class Checkpoint:
+    '''Progress of one script, e.g. Checkpoint('update_player_page', RULES).
+
+    Pages are keyed by title and a hash of the rules' source (see
+    lp_rules.ruleset_hash), so editing a script's rules or the modules
+    they use makes every page eligible again.
+    '''
+
+    def __init__(self, name, rules, path=None):
+        self.name = name
+        self.ruleset = lp_rules.ruleset_hash(rules)
+        self.path = path or os.path.join(lp_cache.CACHE_DIR,
+                                         'checkpoint.sqlite')
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        # The save queue records pages from its writer thread
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.db:
+            self.db.execute('CREATE TABLE IF NOT EXISTS pages ('
+                            'title TEXT, ruleset TEXT, revid INTEGER, '
+                            'PRIMARY KEY (title, ruleset))')
+            self.db.execute('CREATE TABLE IF NOT EXISTS watch ('
+                            'name TEXT PRIMARY KEY, timestamp TEXT)')
+
+    def unchanged(self, page):
+        '''Whether these rules already ran on the page's latest revision.'''
+        with self.lock:
+            row = self.db.execute('SELECT revid FROM pages WHERE title=? '
+                                  'AND ruleset=?', (page.title(),
+                                                    self.ruleset)).fetchone()
+        return row is not None and row[0] == page.latest_revision_id
+
+    def done(self, page, applied=True):
+        '''Record that the rules ran on the page's latest revision. applied
+        is False if they did not finish on it (skipped or failed to save);
+        nothing is recorded then and the next run tries the page again.'''
+        if not applied:
+            return
+        with self.lock, self.db:
+            self.db.execute('INSERT OR REPLACE INTO pages VALUES (?, ?, ?)',
+                            (page.title(), self.ruleset,
+                             page.latest_revision_id))
+
+    def since(self):
+        '''ISO timestamp of the last watch run (see lp_bot.watch), or None.'''
+        with self.lock:
+            row = self.db.execute('SELECT timestamp FROM watch WHERE name=?',
+                                  (self.name,)).fetchone()
+        return row[0] if row else None
+
+    def watched(self, timestamp):
+        '''Changes up to timestamp have been cleaned up.'''
+        with self.lock, self.db:
+            self.db.execute('INSERT OR REPLACE INTO watch VALUES (?, ?)',
+                            (self.name, timestamp))
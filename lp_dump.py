@@ -0,0 +1,130 @@
+'''
+NAME:           lp_dump.py
+AUTHOR:         AquaDragon
+DATE:           18 Oct 2026
+DESCRIPTION:    Find the pages a cleanup script would change from an XML
+                export of the wiki, without any API requests. The titles it
+                writes out can then be cleaned up live with --titles.
+
+                python lp_dump.py update_player_page players.xml -o todo.txt
+                python update_player_page.py --titles todo.txt
+
+                Export a category with Special:Export ("Add pages from
+                category"), current revisions only. .bz2 and .gz files are
+                read as they are.
+'''
+import argparse
+import bz2
+import gzip
+import importlib
+import time
+import xml.etree.ElementTree as ET
+
+import lp_log
+import lp_rules
+
+
+def _open(path):
+    if path.endswith('.bz2'):
+        return bz2.open(path, 'rb')
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def _local(tag):
+    # Tags carry the export schema namespace, e.g.
+    # {http://www.mediawiki.org/xml/export-0.10/}page
+    return tag.rpartition('}')[2]
+
+
+def read_dump(path, namespaces=(0,)):
+    '''Yield (title, text) for the latest revision of each page in an XML
+    export. Pages are dropped as soon as they are read, so memory use does
+    not grow with the size of the dump.'''
+    with _open(path) as f:
+        context = ET.iterparse(f, events=('start', 'end'))
+        _, root = next(context)
+        for event, elem in context:
+            if event != 'end' or _local(elem.tag) != 'page':
+                continue
+
+            title = ns = text = None
+            for child in elem.iter():
+                tag = _local(child.tag)
+                if tag == 'title':
+                    title = child.text
+                elif tag == 'ns':
+                    ns = int(child.text)
+                elif tag == 'text':
+                    # Later revisions come last in the export
+                    text = child.text or ''
+            if text is not None and (namespaces is None or ns in namespaces):
+                yield title, text
+
+            # Finished pages stay attached to the root otherwise
+            root.clear()
+
+
+def write_titles(path, titles):
+    with open(path, 'w', encoding='utf-8') as f:
+        for title in titles:
+            f.write(title + '\n')
+
+
+def read_titles(path):
+    '''Titles written by write_titles(), one per line.'''
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='List the pages of an XML export a cleanup script would '
+                    'change.')
+    parser.add_argument('script', help='e.g. update_player_page')
+    parser.add_argument('dump', help='XML export, optionally .bz2 or .gz')
+    parser.add_argument('-o', '--output',
+                        help='write the titles to this file')
+    parser.add_argument('--budget', type=float, default=lp_rules.BUDGET,
+                        help='seconds per page before it is skipped')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='worker processes to run the rules in')
+    args = parser.parse_args(argv)
+    # Only the pages that would change are printed, see lp_rules.main()
+    lp_log.errors_only()
+
+    rules = importlib.import_module(args.script).RULES
+
+    # Titles in the export stand in for the wiki when a rule checks whether
+    # another page exists. This takes a first pass over the dump, but only
+    # the titles are kept.
+    titles = {title for title, _ in read_dump(args.dump, namespaces=None)}
+
+    start = time.perf_counter()
+    pages = 0
+    changed = []
+
+    def counted(dump):
+        nonlocal pages
+        for page in dump:
+            pages += 1
+            yield page
+
+    for title, _, edits in lp_rules.run_offline(
+            rules, counted(read_dump(args.dump)), titles.__contains__,
+            budget=args.budget, jobs=args.jobs,
+            on_skip=lp_rules.print_skipped):
+        changed.append(title)
+        print('{0}: {1}'.format(title, ', '.join(edits)))
+    elapsed = time.perf_counter() - start
+
+    if args.output is not None:
+        write_titles(args.output, changed)
+    print('\n!! {0} of {1} pages would change ({2:.2f} s, {3:.0f} pages/s)'.
+          format(len(changed), pages, elapsed,
+                 pages / elapsed if elapsed else 0))
+
+
+if __name__ == '__main__':
+    main()
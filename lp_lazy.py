@@ -0,0 +1,38 @@
+'''
+NAME:           lp_lazy.py
+AUTHOR:         AquaDragon
+DATE:           18 Oct 2026
+DESCRIPTION:    Deferred imports for the bot scripts. pywikibot reads its
+                config and family files when it is imported, which takes
+                longer than most offline runs; modules hold a LazyModule
+                instead and pywikibot is only imported once a live
+                operation uses it.
+'''
+import importlib
+import threading
+
+
+class LazyModule:
+    '''Stands in for the module name, which is imported the first time
+    one of its attributes is used.'''
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, attr):
+        # Only called for attributes not set in __init__
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self):
+        return 'LazyModule({0!r})'.format(self._name)
+
+
+pywikibot = LazyModule('pywikibot')
+api = LazyModule('pywikibot.data.api')
+pagegenerators = LazyModule('pywikibot.pagegenerators')
@@ -0,0 +1,129 @@
+'''
+NAME:           lp_log.py
+AUTHOR:         AquaDragon
+DATE:           18 Oct 2026
+DESCRIPTION:    Edit log for the bot scripts. Every page the rules touch is
+                written as one JSON line holding the edit summary and a
+                unified diff, to a buffered file under ./logs that rotates
+                when it gets large. The console only gets one line per
+                edited page, more or less with -v and -q.
+'''
+import datetime
+import difflib
+import json
+import logging
+import logging.handlers
+import os
+import sys
+
+LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
+
+# Bytes per log file before it is rotated, and rotated files kept
+LOG_SIZE = 10 * 1024 * 1024
+LOG_BACKUPS = 5
+
+# Entries held in memory before they are written out. Warnings are written
+# straight away.
+BUFFER = 50
+
+# Lines of context around each change in the diffs
+CONTEXT = 1
+
+logger = logging.getLogger('lp')
+
+
+class _JSONFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {'time': datetime.datetime.fromtimestamp(record.created)
+                 .isoformat(timespec='seconds'),
+                 'level': record.levelname,
+                 'message': record.getMessage()}
+        entry.update(getattr(record, 'fields', {}))
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class _ConsoleFormatter(logging.Formatter):
+    def __init__(self, diffs=False):
+        super().__init__()
+        self.diffs = diffs
+
+    def format(self, record):
+        message = record.getMessage()
+        diff = getattr(record, 'fields', {}).get('diff')
+        if self.diffs and diff:
+            message += '\n' + diff
+        return message
+
+
+def diff(title, old, new, context=CONTEXT):
+    '''Unified diff of a page's text.'''
+    return '\n'.join(difflib.unified_diff(old.splitlines(),
+                                          new.splitlines(), title, title,
+                                          n=context, lineterm=''))
+
+
+def edit(title, old, new, summary):
+    '''A page the rules changed.'''
+    logger.info('%s: %s', title, summary,
+                extra={'fields': {'event': 'edit', 'title': title,
+                                  'summary': summary,
+                                  'diff': diff(title, old, new)}})
+
+
+def unchanged(title):
+    logger.debug('No changes to %s, page skipped', title,
+                 extra={'fields': {'event': 'unchanged', 'title': title}})
+
+
+def skipped(title, reason):
+    '''A page the rules gave up on.'''
+    logger.warning('Skipped %s', reason,
+                   extra={'fields': {'event': 'skipped', 'title': title}})
+
+
+def errors_only():
+    '''Keep the rules' warnings (e.g. on Swiss tables) off the console,
+    for the runners that print their own line per page.'''
+    logger.setLevel(logging.ERROR)
+
+
+def add_arguments(parser):
+    '''Logging options for a script's argument parser.'''
+    parser.add_argument('-v', '--verbose', action='count', default=0,
+                        help='-v lists unchanged pages too, -vv prints '
+                             'the diffs')
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help='only print warnings')
+    parser.add_argument('--log', metavar='FILE',
+                        help='edit log file (default logs/<script>.log)')
+
+
+def setup(name, args=None):
+    '''Send the log to the console and to a rotating file, for the script
+    name, with the options from add_arguments().'''
+    verbose = getattr(args, 'verbose', 0)
+    quiet = getattr(args, 'quiet', False)
+    path = getattr(args, 'log', None) or os.path.join(LOG_DIR, name + '.log')
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(_ConsoleFormatter(diffs=verbose >= 2))
+    if quiet:
+        console.setLevel(logging.WARNING)
+    elif verbose:
+        console.setLevel(logging.DEBUG)
+    else:
+        console.setLevel(logging.INFO)
+    logger.addHandler(console)
+
+    target = logging.handlers.RotatingFileHandler(
+        path, maxBytes=LOG_SIZE, backupCount=LOG_BACKUPS, encoding='utf-8')
+    target.setFormatter(_JSONFormatter())
+    logger.addHandler(logging.handlers.MemoryHandler(
+        BUFFER, flushLevel=logging.WARNING, target=target))
@@ -0,0 +1,229 @@
+'''
+NAME:           lp_pages.py
+AUTHOR:         AquaDragon
+DATE:           18 Oct 2026
+DESCRIPTION:    Shared page sources for the Liquipedia bot scripts. Pages are
+                fetched in batches instead of one API request per page.
+'''
+import functools
+import itertools
+import queue
+import threading
+
+import lp_cache
+import lp_throttle
+from lp_lazy import api, pagegenerators, pywikibot
+
+# Number of pages whose text is fetched per API request. 50 is the
+# MediaWiki limit for normal accounts (500 with the apihighlimits right).
+GROUPSIZE = 50
+
+# Number of batches fetched ahead of the page being edited. 0 fetches each
+# batch only once the previous one has been used up.
+LOOKAHEAD = 1
+
+
+@functools.lru_cache(maxsize=None)
+def get_site(code='pokemon', fam='liquipedia'):
+    '''The wiki site, created on first use.'''
+    return pywikibot.Site(code=code, fam=fam)
+
+
+@functools.lru_cache(maxsize=None)
+def text_cache():
+    '''The page text cache under ./cache, opened on first use.'''
+    return lp_cache.TextCache()
+
+
+def preload(pages, groupsize=GROUPSIZE, lookahead=LOOKAHEAD, cached=True,
+            info=False):
+    '''Yield pages with their text fetched in batches of groupsize. With
+    cached, text already in the text cache at the page's latest revision
+    is not downloaded again. info tells that the pages' info, the latest
+    revision among it, is already loaded (e.g. by skip_unchanged()), so it
+    is not asked for again.'''
+    gen = _preloading(pages, groupsize, text_cache() if cached else None,
+                      info)
+    if lookahead <= 0:
+        return gen
+    return _read_ahead(gen, groupsize * lookahead)
+
+
+def _preloading(pages, groupsize, cache=None, info=False):
+    # What PreloadingGenerator does for a single site, timing each request
+    for batch in batches(pages, groupsize):
+        site = batch[0].site
+        if cache is None:
+            with lp_throttle.read(site, 'fetch'):
+                loaded = list(site.preloadpages(batch, groupsize=groupsize))
+            yield from loaded
+            continue
+
+        # Ask for the latest revision IDs only, then download the text of
+        # the pages that are not cached at that revision
+        if not info:
+            with lp_throttle.read(site, 'info'):
+                for _ in site.preloadpages(batch, groupsize=groupsize,
+                                           content=False):
+                    pass
+        missing = []
+        for page in batch:
+            text = None
+            if page.exists():
+                text = cache.get(page.title(), page.latest_revision_id)
+            if text is None:
+                missing.append(page)
+            else:
+                page.text = text
+        if missing:
+            with lp_throttle.read(site, 'fetch'):
+                for _ in site.preloadpages(missing, groupsize=groupsize):
+                    pass
+            for page in missing:
+                if page.exists():
+                    cache.put(page.title(), page.latest_revision_id,
+                              page.text)
+        yield from batch
+
+
+def _read_ahead(gen, maxsize):
+    # Fetch pages in a background thread while the caller works on the
+    # current ones. The queue is bounded so memory use stays flat.
+    buffer = queue.Queue(maxsize=maxsize)
+    done = object()
+
+    def fill():
+        try:
+            for page in gen:
+                buffer.put(page)
+        except Exception as err:
+            buffer.put(err)
+        buffer.put(done)
+
+    threading.Thread(target=fill, daemon=True).start()
+
+    while True:
+        item = buffer.get()
+        if item is done:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+def category_pages(site, category, start='', total=None, content=True,
+                   groupsize=GROUPSIZE, lookahead=LOOKAHEAD, checkpoint=None):
+    '''Pages of a category in the main namespace, text preloaded.
+
+    With a checkpoint (see lp_checkpoint.py), pages whose latest revision
+    was already cleaned up by the same rules are left out, which is how a
+    run picks up after an interrupted one. That costs one page info
+    request per groupsize pages. Starting from the last title handled
+    instead would not work: start is a sort key prefix, and a page's
+    DEFAULTSORT key can sort far from its title.
+    '''
+    gen = pagegenerators.CategorizedPageGenerator(
+        pywikibot.Category(site, category),
+        recurse=False, namespaces=[0], start=start, total=total)
+    if checkpoint is not None:
+        gen = skip_unchanged(gen, checkpoint, groupsize)
+    if not content:
+        return gen
+    return preload(gen, groupsize=groupsize, lookahead=lookahead,
+                   info=checkpoint is not None)
+
+
+def titled_pages(site, titles, groupsize=GROUPSIZE, lookahead=LOOKAHEAD):
+    '''Pages with the given titles, text preloaded.'''
+    return preload((pywikibot.Page(site, title) for title in titles),
+                   groupsize=groupsize, lookahead=lookahead)
+
+
+def recent_pages(site, category, since, groupsize=GROUPSIZE,
+                 lookahead=LOOKAHEAD):
+    '''Pages of a category edited or added to it since the timestamp
+    since, text preloaded. Edits by the bot itself are left out.
+
+    Recent changes only go back 30 days on MediaWiki, older timestamps
+    need a full category run instead.
+    '''
+    changes = site.recentchanges(start=since, reverse=True, namespaces=[0],
+                                 changetype='edit|new',
+                                 excludeuser=site.user())
+    titles = list(dict.fromkeys(change['title'] for change in changes))
+
+    # Only keep edited pages that are in the category, from the
+    # categories fetched along with their text
+    cat = pywikibot.Category(site, category)
+    edited = [pywikibot.Page(site, title) for title in titles]
+    for batch in batches(edited, groupsize):
+        with lp_throttle.read(site, 'fetch'):
+            loaded = list(site.preloadpages(batch, groupsize=groupsize,
+                                            categories=True))
+        for page in loaded:
+            if page.exists() and cat in page.categories():
+                yield page
+
+    # Pages that were only just added to the category, e.g. by a template
+    seen = set(titles)
+    added = site.categorymembers(cat, namespaces=[0], sortby='timestamp',
+                                 starttime=since)
+    yield from preload((page for page in added if page.title() not in seen),
+                       groupsize=groupsize, lookahead=lookahead)
+
+
+def skip_unchanged(pages, checkpoint, groupsize=GROUPSIZE):
+    '''Yield the pages the checkpoint has not seen at their latest revision.
+    Only page info is fetched, so skipped pages never have their text
+    downloaded.'''
+    for batch in batches(pages, groupsize):
+        site = batch[0].site
+        with lp_throttle.read(site, 'info'):
+            for _ in site.preloadpages(batch, groupsize=groupsize,
+                                       content=False):
+                pass
+        # Keep the category order, which resuming relies on
+        for page in batch:
+            if not checkpoint.unchanged(page):
+                yield page
+
+
+def batches(pages, size=GROUPSIZE):
+    '''Split an iterable of pages into lists of up to size pages.'''
+    pages = iter(pages)
+    while True:
+        batch = list(itertools.islice(pages, size))
+        if not batch:
+            return
+        yield batch
+
+
+def exists_many(site, titles, groupsize=GROUPSIZE):
+    '''Whether each title exists, as {title: bool}, using one API request
+    per groupsize titles instead of one per title.'''
+    pages = {title: pywikibot.Page(site, title) for title in titles}
+    # Page info only; preloading fills in what page.exists() reads
+    with lp_throttle.read(site, 'exists'):
+        for _ in site.preloadpages(list(pages.values()), groupsize=groupsize,
+                                   content=False):
+            pass
+    return {title: page.exists() for title, page in pages.items()}
+
+
+def file_hashes(site, titles, groupsize=GROUPSIZE):
+    '''SHA-1 of the current version of each file, as {title: sha1}, or
+    None for files that do not exist. One API request per groupsize
+    titles.'''
+    hashes = dict.fromkeys(titles)
+    # The API answers with normalised titles, e.g. File:Pkmn-...
+    normal = {pywikibot.Page(site, title).title(): title for title in titles}
+    for batch in batches(normal, groupsize):
+        info = api.PropertyGenerator(
+            'imageinfo', site=site,
+            parameters={'titles': batch, 'iiprop': 'sha1'})
+        with lp_throttle.read(site, 'exists'):
+            info = list(info)
+        for page in info:
+            if 'imageinfo' in page:
+                hashes[normal[page['title']]] = page['imageinfo'][0]['sha1']
+    return hashes
@@ -0,0 +1,338 @@
+'''
+NAME:           lp_rules.py
+AUTHOR:         AquaDragon
+DATE:           18 Oct 2026
+DESCRIPTION:    Rule engine for the cleanup scripts. A cleanup is a list of
+                named rules, each a pure function of the page text, so the
+                same rules can be run on local wikitext files without
+                logging in to Liquipedia.
+
+USAGE:          python lp_rules.py update_player_page ./pages [-o ./out] [-j 4]
+'''
+import argparse
+import hashlib
+import importlib
+import inspect
+import multiprocessing
+import os
+import sys
+import time
+from urllib.parse import quote, unquote
+
+import lp_log
+import lp_stats
+import lp_wikitext
+
+# Extensions of wikitext files read by the offline runner
+EXTENSIONS = ('.wiki', '.txt')
+
+# Seconds a single page may spend in the rules before it is skipped
+BUDGET = 5.0
+
+# Pages sent to a worker process at a time by the offline runner
+CHUNKSIZE = 20
+
+
+class BudgetExceeded(Exception):
+    '''A page took longer than its time budget to clean up.'''
+
+
+class RuleError(Exception):
+    '''A rule raised on a page, e.g. on a template missing a field. The
+    original exception is the __cause__.'''
+
+
+class Rule:
+    '''A named cleanup step. func(text, ctx) returns (text, edits).
+
+    gate is a substring (or tuple of substrings) the text must contain for
+    the rule to run at all. It is checked before any regex is tried, so
+    pages that cannot match skip the rule for the cost of a find().
+
+    prefetch(text, ctx), if given, returns the titles the rule will pass
+    to ctx.exists(), so the runner can check a whole batch of pages with
+    one query before the rules run.
+    '''
+
+    def __init__(self, name, func, gate=(), prefetch=None):
+        self.name = name
+        self.func = func
+        self.gate = (gate,) if isinstance(gate, str) else tuple(gate)
+        self.prefetch = prefetch
+
+    def applies(self, text):
+        return all(s in text for s in self.gate)
+
+    def __repr__(self):
+        return 'Rule({0!r})'.format(self.name)
+
+
+class RuleSets:
+    '''The rules of several scripts, picked per page.
+
+    sets is a list of (match, rules) where match(title) tells whether the
+    page belongs to that script. A page gets the rules of every set it
+    matches, in order, each rule only once. Iterating gives every rule.
+    '''
+
+    def __init__(self, sets):
+        self.sets = sets
+
+    def select(self, title):
+        rules = []
+        for match, ruleset in self.sets:
+            if match(title):
+                rules.extend(rule for rule in ruleset if rule not in rules)
+        return rules
+
+    def __iter__(self):
+        rules = []
+        for _, ruleset in self.sets:
+            rules.extend(rule for rule in ruleset if rule not in rules)
+        return iter(rules)
+
+
+def select(rules, title):
+    '''The rules to run on title, from a list of rules or a RuleSets.'''
+    if isinstance(rules, RuleSets):
+        return rules.select(title)
+    return rules
+
+
+class Context:
+    '''What a rule may know about the page besides its current text.'''
+
+    def __init__(self, title, text, exists=None):
+        self.title = title
+        self.original = text
+        self._exists = exists
+        self._doc = None
+
+    def exists(self, title):
+        if self._exists is None:
+            return False
+        return self._exists(title)
+
+    def doc(self, text):
+        '''The parsed page for text. Rules that edit through the returned
+        Document keep it valid for the next rule; any other change to the
+        text makes the next call parse the page again.'''
+        if self._doc is None or (self._doc.text is not text and
+                                 self._doc.text != text):
+            self._doc = lp_wikitext.Document(text)
+        return self._doc
+
+
+def ruleset_hash(rules):
+    '''Hash of the rule names and the source of the modules defining
+    them, and of the lp_* modules those import (e.g. lp_wikitext or
+    lp_tables, which do much of the work), which changes whenever the rules
+    might behave differently.'''
+    sha = hashlib.sha1()
+    modules = []
+    for rule in rules:
+        sha.update(rule.name.encode('utf-8'))
+        module = inspect.getmodule(rule.func)
+        if module not in modules:
+            modules.append(module)
+    sources = []
+    for module in modules:
+        for name in [module.__name__] + _imported(module):
+            source = inspect.getsourcefile(sys.modules[name])
+            if source not in sources:
+                sources.append(source)
+    for source in sources:
+        with open(source, 'rb') as f:
+            sha.update(f.read())
+    return sha.hexdigest()
+
+
+def _imported(module):
+    # Names of the lp_* modules imported by module, as modules or with
+    # from ... import
+    names = []
+    for value in vars(module).values():
+        if inspect.ismodule(value):
+            name = value.__name__
+        elif inspect.isfunction(value) or inspect.isclass(value):
+            name = value.__module__
+        else:
+            continue
+        if name.startswith('lp_') and name not in names:
+            names.append(name)
+    return sorted(names)
+
+
+def prefetch_titles(rules, title, text):
+    '''Titles the rules will check for existence on this page.'''
+    ctx = Context(title, text)
+    titles = []
+    for rule in select(rules, title):
+        if rule.prefetch is not None and rule.applies(text):
+            titles.extend(rule.prefetch(text, ctx))
+    return titles
+
+
+def apply(rules, text, ctx, budget=BUDGET):
+    '''Run text through each rule in order, return (text, edits).
+
+    Raises BudgetExceeded once the rules have taken more than budget
+    seconds on the page (None for no limit). The check runs between rules,
+    so a slow page is stopped before the rest of the pipeline runs on it.
+    Raises RuleError if a rule raises.
+    '''
+    start = now = time.perf_counter()
+    edits = []
+    for rule in select(rules, ctx.title):
+        if not rule.applies(text):
+            lp_stats.STATS.rule(rule.name, gated=True)
+            continue
+        try:
+            text, new_edits = rule.func(text, ctx)
+        except Exception as err:
+            lp_stats.STATS.error(rule.name, ctx.title, err)
+            raise RuleError('{0}: rule {1!r} raised {2!r}'.format(
+                ctx.title, rule.name, err)) from err
+        edits.extend(new_edits)
+        last, now = now, time.perf_counter()
+        lp_stats.STATS.rule(rule.name, now - last, bool(new_edits))
+        if budget is not None and now - start > budget:
+            raise BudgetExceeded('{0}: over {1} s budget after rule {2!r}'.
+                                 format(ctx.title, budget, rule.name))
+    return text, edits
+
+
+# Offline runner
+def title_to_filename(title):
+    return quote(title, safe=' ') + EXTENSIONS[0]
+
+
+def read_directory(path):
+    '''Yield (title, text) for every wikitext file in path.'''
+    for name in sorted(os.listdir(path)):
+        stem, ext = os.path.splitext(name)
+        if ext not in EXTENSIONS:
+            continue
+        with open(os.path.join(path, name), encoding='utf-8') as f:
+            yield unquote(stem), f.read()
+
+
+# Rules, exists and budget of the current offline run. Worker processes
+# get them once when they start (inherited on fork), not with every page.
+_shared = None
+
+
+def _init_worker(rules, exists, budget):
+    global _shared
+    _shared = rules, exists, budget
+
+
+def _transform(page):
+    # (title, new text or None if unchanged, edits or the error)
+    rules, exists, budget = _shared
+    title, text = page
+    ctx = Context(title, text, exists=exists)
+    try:
+        with lp_stats.STATS.page():
+            new_text, edits = apply(rules, text, ctx, budget)
+    except (BudgetExceeded, RuleError) as err:
+        return title, None, err
+    if new_text == text:
+        return title, None, edits
+    lp_stats.STATS.edited(text, new_text)
+    return title, new_text, edits
+
+
+def run_offline(rules, pages, exists=None, output=None, budget=BUDGET,
+                jobs=1, chunksize=CHUNKSIZE, on_skip=None):
+    '''Apply rules to (title, text) pairs. Yield (title, text, edits) for
+    the pages that would change, writing them to output if given. Pages
+    that run over the budget or on which a rule raises are skipped, and
+    passed to on_skip(title, error) if given (see print_skipped).
+
+    With jobs > 1 the rules run in that many worker processes, chunksize
+    pages at a time. Results still come back in the order of pages.
+    '''
+    if jobs <= 1:
+        _init_worker(rules, exists, budget)
+        results = map(_transform, pages)
+        pool = None
+    else:
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context(
+            'fork' if 'fork' in methods else None)
+        pool = context.Pool(jobs, initializer=_init_worker,
+                            initargs=(rules, exists, budget))
+        results = pool.imap(_transform, pages, chunksize)
+
+    try:
+        for title, new_text, edits in results:
+            if isinstance(edits, Exception):
+                if on_skip is not None:
+                    on_skip(title, edits)
+                continue
+            if new_text is None:
+                continue
+            if output is not None:
+                with open(os.path.join(output, title_to_filename(title)),
+                          'w', encoding='utf-8') as f:
+                    f.write(new_text)
+            yield title, new_text, edits
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+
+def print_skipped(title, err):
+    '''on_skip for run_offline() that prints the page to the console.'''
+    print('Skipped {0}'.format(err))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Run a cleanup script on local wikitext files.')
+    parser.add_argument('script', help='e.g. update_player_page')
+    parser.add_argument('path', help='directory of .wiki/.txt files')
+    parser.add_argument('-o', '--output',
+                        help='write changed pages to this directory')
+    parser.add_argument('--budget', type=float, default=BUDGET,
+                        help='seconds per page before it is skipped')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='worker processes to run the rules in')
+    lp_stats.add_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.jobs > 1 and (args.report or args.profile):
+        # Statistics are only collected in this process
+        parser.error('--report and --profile need -j 1')
+    # The pages that would change are printed below, the warnings of a few
+    # thousand pages would bury them
+    lp_log.errors_only()
+
+    rules = importlib.import_module(args.script).RULES
+    pages = list(read_directory(args.path))
+    # Pages in the same directory stand in for the wiki when a rule checks
+    # whether another page exists (e.g. <player>/Broadcasts)
+    titles = {title for title, _ in pages}
+
+    if args.output is not None:
+        os.makedirs(args.output, exist_ok=True)
+
+    start = time.perf_counter()
+    changed = 0
+    # Worker processes keep their own statistics, the summary of this one
+    # would say 0 pages
+    with lp_stats.reporting(args, summary=args.jobs <= 1):
+        for title, _, edits in run_offline(rules, pages, titles.__contains__,
+                                           args.output, args.budget,
+                                           args.jobs, on_skip=print_skipped):
+            changed += 1
+            print('{0}: {1}'.format(title, ', '.join(edits)))
+    elapsed = time.perf_counter() - start
+
+    print('\n!! {0} of {1} pages would change ({2:.2f} s, {3:.0f} pages/s)'.
+          format(changed, len(pages), elapsed,
+                 len(pages) / elapsed if elapsed else 0))
+
+
+if __name__ == '__main__':
+    main()
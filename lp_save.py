@@ -0,0 +1,147 @@
+'''
+NAME:           lp_save.py
+AUTHOR:         AquaDragon
+DATE:           18 Oct 2026
+DESCRIPTION:    Save queue for the bot scripts. Pages are saved by a writer
+                thread while the next pages are read and cleaned up, so a
+                run is only as slow as the write throttle.
+'''
+import functools
+import queue
+import threading
+import time
+
+import lp_throttle
+from lp_lazy import pywikibot
+
+# Pages waiting to be saved before the cleanup has to wait for the writer
+QUEUE_SIZE = 20
+
+# Attempts per page after an edit conflict, maxlag or server error
+RETRIES = 3
+
+# Seconds to wait before retrying, doubled on each attempt
+RETRY_WAIT = 10
+
+
+def retry(func, retries=RETRIES, retry_wait=RETRY_WAIT, retried=None):
+    '''Return func(), calling it again after maxlag and server errors, up
+    to retries more times and waiting retry_wait seconds doubled on each
+    attempt. retried(), if given, is called before each retry. Other
+    errors, and the last one, are raised.'''
+    for attempt in range(retries + 1):
+        try:
+            return func()
+        except (pywikibot.exceptions.MaxlagTimeoutError,
+                pywikibot.exceptions.ServerError):
+            if attempt == retries:
+                raise
+            if retried is not None:
+                retried()
+            time.sleep(retry_wait * 2 ** attempt)
+
+
+class SaveQueue:
+    '''Saves pages in a background thread, in the order they were queued.
+
+    Saves go through the site's write lane (see lp_throttle.py), which
+    sets the pace and slows down on maxlag and rate limits. put() blocks
+    while the queue is full, which keeps the cleanup from running far
+    ahead of the writer.
+    '''
+
+    def __init__(self, maxsize=QUEUE_SIZE, retries=RETRIES,
+                 retry_wait=RETRY_WAIT):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.retries = retries
+        self.retry_wait = retry_wait
+        self.saved = 0
+        self.conflicts = 0
+        self.retried = 0
+        self.failed = []
+        self.thread = threading.Thread(target=self._drain, daemon=True)
+        self.thread.start()
+
+    def put(self, page, text, summary, redo=None, done=None):
+        '''Queue page to be saved with text. redo() is called after an edit
+        conflict, once the page has been reloaded, and returns the new
+        (text, summary) or None if there is nothing left to change.
+        done(saved) is called once the page has been handled.'''
+        self.queue.put((page, text, summary, redo, done))
+
+    def call(self, func):
+        '''Run func in the writer thread after the pages queued so far.'''
+        self.queue.put(func)
+
+    def close(self):
+        '''Wait for every queued page to be saved.'''
+        self.queue.put(None)
+        self.thread.join()
+
+    def _drain(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            # Whatever goes wrong with one item, the writer keeps going:
+            # put() and close() would wait on it forever otherwise
+            if callable(item):
+                try:
+                    item()
+                except Exception as err:
+                    self.failed.append(('(queued call)', str(err)))
+                continue
+            page, text, summary, redo, done = item
+            try:
+                saved = self._save(page, text, summary, redo)
+            except Exception as err:
+                self.failed.append((page.title(), str(err)))
+                saved = False
+            if done is not None:
+                try:
+                    done(saved)
+                except Exception as err:
+                    self.failed.append((page.title(), str(err)))
+
+    def _save(self, page, text, summary, redo):
+        '''Save page, return whether the rules' changes are on the wiki.'''
+        for attempt in range(self.retries + 1):
+            last = attempt == self.retries
+            try:
+                page.text = text
+                retry(functools.partial(self._put, page, summary),
+                      self.retries, self.retry_wait, retried=self._retried)
+            except pywikibot.exceptions.EditConflictError as err:
+                # Someone edited the page since it was read, start over
+                # from their version
+                self.conflicts += 1
+                if redo is None or last:
+                    self.failed.append((page.title(), str(err)))
+                    return False
+                del page.text
+                with lp_throttle.read(page.site, 'fetch'):
+                    page.get(force=True)
+                result = redo()
+                if result is None:
+                    return True
+                text, summary = result
+            except Exception as err:
+                self.failed.append((page.title(), str(err)))
+                return False
+            else:
+                self.saved += 1
+                return True
+
+    def _put(self, page, summary):
+        with lp_throttle.write(page.site, 'save'):
+            page.save(summary)
+
+    def _retried(self):
+        self.retried += 1
+
+    def report(self):
+        print('\n!! Saved {0} pages, {1} edit conflicts, {2} retries, '
+              '{3} failed'.format(self.saved, self.conflicts, self.retried,
+                                  len(self.failed)))
+        for title, error in self.failed:
+            print('   {0}: {1}'.format(title, error))
@@ -0,0 +1,241 @@
+'''
+NAME:           lp_stats.py
+AUTHOR:         AquaDragon
+DATE:           18 Oct 2026
+DESCRIPTION:    Run statistics for the bot scripts: time spent in each rule
+                and how often it changed a page or raised, latency of each
+                kind of API call, bytes changed and pages per minute.
+                Everything is recorded into STATS, which the scripts write
+                out with --report.
+'''
+import contextlib
+import cProfile
+import csv
+import json
+import threading
+import time
+
+# Upper bounds in seconds of the API latency histogram buckets
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# Titles kept as examples for each kind of rule error
+EXAMPLES = 5
+
+
+class Histogram:
+    '''Latencies in seconds, counted per bucket of BUCKETS.'''
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def as_dict(self):
+        labels = ['<={0}s'.format(bound) for bound in self.buckets]
+        labels.append('>{0}s'.format(self.buckets[-1]))
+        return {'count': self.count, 'total': round(self.total, 3),
+                'mean': round(self.total / self.count, 3)
+                if self.count else 0,
+                'max': round(self.max, 3),
+                'buckets': dict(zip(labels, self.counts))}
+
+
+class Stats:
+    '''Counters for one run. Safe to use from the save thread.'''
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.start = time.perf_counter()
+        self.pages = 0
+        # name: [runs, gated out, pages changed, seconds]
+        self.rules = {}
+        self.calls = {}
+        # Pages changed, their size in bytes before and after
+        self.edits = [0, 0, 0]
+        # (rule, exception type): [pages, example titles]
+        self.errors = {}
+        self.profiler = None
+        self.sample = 0
+
+    def rule(self, name, seconds=0.0, changed=False, gated=False):
+        with self.lock:
+            entry = self.rules.setdefault(name, [0, 0, 0, 0.0])
+            if gated:
+                entry[1] += 1
+                return
+            entry[0] += 1
+            entry[2] += changed
+            entry[3] += seconds
+
+    def edited(self, old, new):
+        '''Count a page changed from old to new text.'''
+        with self.lock:
+            self.edits[0] += 1
+            self.edits[1] += len(old.encode('utf-8'))
+            self.edits[2] += len(new.encode('utf-8'))
+
+    def error(self, name, title, err):
+        '''Count a page on which rule name raised err.'''
+        with self.lock:
+            entry = self.errors.setdefault((name, type(err).__name__),
+                                           [0, []])
+            entry[0] += 1
+            if len(entry[1]) < EXAMPLES:
+                entry[1].append(title)
+
+    @contextlib.contextmanager
+    def timed(self, kind):
+        '''Time an API call of kind, e.g. 'fetch', 'exists', 'save'.'''
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                self.calls.setdefault(kind, Histogram()).add(elapsed)
+
+    def profile(self, sample):
+        '''Run cProfile on every sample-th page from now on.'''
+        self.profiler = cProfile.Profile()
+        self.sample = sample
+
+    @contextlib.contextmanager
+    def page(self):
+        '''Count a page, profiling it if it is in the sample.'''
+        with self.lock:
+            self.pages += 1
+            profile = self.profiler is not None and \
+                self.pages % self.sample == 0
+        if not profile:
+            yield
+            return
+        self.profiler.enable()
+        try:
+            yield
+        finally:
+            self.profiler.disable()
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.start
+        with self.lock:
+            return {
+                'pages': self.pages,
+                'seconds': round(elapsed, 3),
+                'pages_per_minute': round(self.pages / elapsed * 60, 1)
+                if elapsed else 0,
+                'rules': {name: {'runs': runs, 'gated': gated,
+                                 'changed': changed,
+                                 'seconds': round(seconds, 3)}
+                          for name, (runs, gated, changed, seconds)
+                          in self.rules.items()},
+                'calls': {kind: hist.as_dict()
+                          for kind, hist in self.calls.items()},
+                'edits': {'pages': self.edits[0],
+                          'bytes_before': self.edits[1],
+                          'bytes_after': self.edits[2]},
+                'errors': [{'rule': name, 'error': kind, 'pages': pages,
+                            'examples': list(examples)}
+                           for (name, kind), (pages, examples)
+                           in self.errors.items()],
+                }
+
+    def print_summary(self):
+        summary = self.summary()
+        print('\n!! {0} pages in {1} s ({2} pages/min)'.format(
+            summary['pages'], summary['seconds'],
+            summary['pages_per_minute']))
+        rules = sorted(summary['rules'].items(),
+                       key=lambda item: -item[1]['seconds'])
+        for name, rule in rules:
+            print('   rule {0}: {1} s, changed {2} of {3} pages'.format(
+                name, rule['seconds'], rule['changed'], rule['runs']))
+        for kind, call in summary['calls'].items():
+            print('   {0}: {1} calls, mean {2} s, max {3} s'.format(
+                kind, call['count'], call['mean'], call['max']))
+        edits = summary['edits']
+        if edits['pages']:
+            print('   {0} pages changed, {1} bytes before, {2} after '
+                  '({3:+d})'.format(edits['pages'], edits['bytes_before'],
+                                    edits['bytes_after'],
+                                    edits['bytes_after'] -
+                                    edits['bytes_before']))
+        for error in summary['errors']:
+            print('   rule {0} raised {1} on {2} pages, e.g. {3}'.format(
+                error['rule'], error['error'], error['pages'],
+                ', '.join(error['examples'])))
+
+    def write(self, path):
+        '''Write the summary to path, as CSV if it ends in .csv and JSON
+        otherwise.'''
+        summary = self.summary()
+        if not path.endswith('.csv'):
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(summary, f, indent=1)
+            return
+
+        # One row per rule, per API call kind and per kind of rule error
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['kind', 'name', 'count', 'seconds', 'changed',
+                             'gated', 'mean', 'max'])
+            writer.writerow(['run', 'pages', summary['pages'],
+                             summary['seconds'], '', '', '', ''])
+            for name, rule in summary['rules'].items():
+                writer.writerow(['rule', name, rule['runs'], rule['seconds'],
+                                 rule['changed'], rule['gated'], '', ''])
+            for kind, call in summary['calls'].items():
+                writer.writerow(['call', kind, call['count'], call['total'],
+                                 '', '', call['mean'], call['max']])
+            for name, count in summary['edits'].items():
+                writer.writerow(['edits', name, count, '', '', '', '', ''])
+            for error in summary['errors']:
+                writer.writerow(['error', '{0} {1}'.format(error['rule'],
+                                                           error['error']),
+                                 error['pages'], '', '', '', '', ''])
+
+    def dump_profile(self, path):
+        if self.profiler is not None:
+            self.profiler.dump_stats(path)
+
+
+STATS = Stats()
+
+
+def add_arguments(parser):
+    '''--report and --profile options for a script's argument parser.'''
+    parser.add_argument('--report', metavar='FILE',
+                        help='write run statistics to FILE (.json or .csv)')
+    parser.add_argument('--profile', metavar='FILE',
+                        help='write a cProfile dump of sampled pages to FILE')
+    parser.add_argument('--sample', type=int, default=10, metavar='N',
+                        help='with --profile, profile every N-th page')
+
+
+@contextlib.contextmanager
+def reporting(args, summary=True):
+    '''Collect statistics while the script runs, then write what args
+    (see add_arguments) asked for. summary=False leaves out the printed
+    summary, e.g. when the pages are handled in other processes.'''
+    if args.profile:
+        STATS.profile(args.sample)
+    try:
+        yield STATS
+    finally:
+        if summary:
+            STATS.print_summary()
+        if args.report:
+            STATS.write(args.report)
+        if args.profile:
+            STATS.dump_profile(args.profile)
@@ -0,0 +1,221 @@
+'''
+NAME:           lp_tables.py
+AUTHOR:         AquaDragon
+DATE:           18 Oct 2026
+DESCRIPTION:    Table engine for League Cup pages. Reads every row of a Swiss
+                standings table into columns in one pass over the text,
+                normalises and checks them column by column, and rewrites
+                only the rows that change. Prize pool templates are cleaned
+                up inside their own span.
+'''
+import re
+
+# Columns of a Swiss table row, in the order of the positional form
+# {{Swiss table/row|place| |flag|name|W|L|T|opw|oopw}}
+COLUMNS = ('place', 'flag', 'name', 'win_m', 'lose_m', 'tie_m', 'opw%',
+           'oopw%')
+
+# Named form, {{Swiss table/row|place=|flag=|name|win_m=|...}}: parameter
+# for each column
+NAMED = {'place': 'place', 'flag': 'flag', 'name': '1', 'win_m': 'win_m',
+         'lose_m': 'lose_m', 'tie_m': 'tie_m', 'opw%': 'opw%',
+         'oopw%': 'oopw%'}
+
+# Positional form: parameter for each column, 2 is always blank
+POSITIONAL = {'place': '1', 'flag': '3', 'name': '4', 'win_m': '5',
+              'lose_m': '6', 'tie_m': '7', 'opw%': '8', 'oopw%': '9'}
+
+# A row is one line with at most one level of templates nested in it
+# (e.g. {{Player|...}} as the name): the template name as written, then
+# the columns in the named form, the columns in the positional form, or
+# else any parameters. A brace is only taken as part of a nested
+# template, so a row that does not close fails at the next brace or
+# newline instead of backtracking.
+_NESTED = r'\{\{[^{}\n]*\}\}'
+_VALUE = r'([^{{}}|=\n]*(?:{0}[^{{}}|=\n]*)*)'.format(_NESTED)
+_NAMED = (r'\|place={0}\|flag={0}\|{0}\|win_m={0}\|lose_m={0}\|tie_m={0}'
+          r'\|opw%={0}\|oopw%={0}').format(_VALUE)
+_POSITIONAL = (r'\|{0}\| *' + r'\|{0}' * 7).format(_VALUE)
+ROW_RE = re.compile(r'\{\{( *Swiss table/row *)(?:' + _NAMED + '|' +
+                    _POSITIONAL + r'|((?:\|[^{}\n]*(?:' + _NESTED +
+                    r'[^{}\n]*)*)?))\}\}')
+
+# Start of every row, read or not
+ROW_START_RE = re.compile(r'\{\{ *Swiss table/row *[|}]')
+
+# One parameter of a row; the | inside a [[link|label]] or a nested
+# {{template|...}} does not end it
+PARAM_RE = re.compile(r'\|((?:\[\[[^\[\]\n]*\]\]|' + _NESTED + r'|[^|])*)')
+
+ROUNDS_RE = re.compile(r'\{\{ *Swiss table/start *(\|rounds=0)(?= *[|}])')
+
+NUMBER_RE = re.compile(r'\s*[0-9]+(\.[0-9]*)?\s*$')
+
+
+def row_params(body):
+    '''{name: value} of a row's parameters, positional ones numbered. Like
+    MediaWiki, the spaces around named values are dropped.'''
+    params = {}
+    position = 0
+    for raw in PARAM_RE.findall(body):
+        # An = inside a nested template does not name the parameter
+        if '=' in raw.partition('{{')[0]:
+            key, sep, value = raw.partition('=')
+        else:
+            sep = ''
+        if sep:
+            name, value = key.strip(), value.strip()
+        else:
+            position += 1
+            name, value = str(position), raw
+        params.setdefault(name, value)
+    return params
+
+
+class SwissTable:
+    '''The rows of the Swiss tables on a page, as columns.
+
+    columns[name][i] is the raw value of column name in row i, and rows[i]
+    is the (start, end, template name) of the row in text. Rows that are in
+    neither form, or cannot be read at all, are left out of the columns
+    and kept in skipped as (offset in text, reason).
+    '''
+
+    def __init__(self, text):
+        self.text = text
+        self.rows = []
+        self.columns = {column: [] for column in COLUMNS}
+        self.skipped = []
+
+        named = set(NAMED.values())
+        positional = set(POSITIONAL.values()) | {'2'}
+        found = []
+        for res in ROW_RE.finditer(text):
+            groups = res.groups()
+            if groups[1] is not None:
+                # Every column but the name is a named parameter
+                values = [value if column == 'name' else value.strip()
+                          for column, value in zip(COLUMNS, groups[1:9])]
+            elif groups[9] is not None:
+                values = groups[9:17]
+            else:
+                # Parameters in another order, with spaces or with links
+                params = row_params(groups[17])
+                if params.keys() == named:
+                    form = NAMED
+                elif params.keys() == positional:
+                    form = POSITIONAL
+                else:
+                    self.skipped.append((res.start(),
+                                         'unexpected parameters'))
+                    continue
+                values = [params[form[column]] for column in COLUMNS]
+            self.rows.append((res.start(), res.end(), groups[0]))
+            found.append(values)
+
+        # Rows ROW_RE did not match at all, looked for only if some are
+        # missing
+        if text.count('Swiss table/row') > len(self.rows) + len(self.skipped):
+            read = {start for start, _, _ in self.rows}
+            read.update(offset for offset, _ in self.skipped)
+            self.skipped.extend((res.start(), 'cannot be read')
+                                for res in ROW_START_RE.finditer(text)
+                                if res.start() not in read)
+            self.skipped.sort()
+
+        # Rows to columns
+        for column, values in zip(COLUMNS, zip(*found)):
+            self.columns[column] = list(values)
+
+    def normalize(self):
+        '''Drop the % sign after the opponent win percentages. Returns the
+        rows that cannot be normalised, with the reason.'''
+        problems = []
+        for column in ('opw%', 'oopw%'):
+            values = self.columns[column]
+            values[:] = [value.strip()[:-1] if value.strip().endswith('%')
+                         else value for value in values]
+            problems.extend((i, '{0} {1!r}'.format(column, value))
+                            for i, value in enumerate(values)
+                            if '%' in value)
+        return problems
+
+    def validate(self):
+        '''Problems with the values, as (row index, description).'''
+        problems = []
+        places = self.columns['place']
+        for i, place in enumerate(places):
+            if not place.strip().isdigit():
+                problems.append((i, 'place {0!r}'.format(place)))
+            elif i and places[i - 1].strip().isdigit() and \
+                    int(place) < int(places[i - 1]):
+                problems.append((i, 'place {0} after {1}'.format(
+                    place.strip(), places[i - 1].strip())))
+
+        # Matches played, which no row should have more of than most rows
+        totals = []
+        for i, games in enumerate(zip(self.columns['win_m'],
+                                      self.columns['lose_m'],
+                                      self.columns['tie_m'])):
+            if all(value.strip().isdigit() for value in games):
+                totals.append((i, sum(int(value) for value in games)))
+            else:
+                problems.append((i, 'W/L/T {0}'.format('/'.join(games))))
+        if totals:
+            counts = [total for _, total in totals]
+            usual = max(set(counts), key=counts.count)
+            problems.extend((i, '{0} matches, most played {1}'.format(
+                total, usual)) for i, total in totals if total > usual)
+
+        for column in ('opw%', 'oopw%'):
+            for i, value in enumerate(self.columns[column]):
+                number = NUMBER_RE.match(value.rstrip('%'))
+                if number is None or float(value.rstrip('%')) > 100:
+                    problems.append((i, '{0} {1!r}'.format(column, value)))
+        return problems
+
+    def serialize(self, i):
+        '''Row i in the positional form.'''
+        values = [self.columns[column][i] for column in COLUMNS]
+        return '{{{{{0}|{1}| |{2}}}}}'.format(self.rows[i][2], values[0],
+                                              '|'.join(values[1:]))
+
+    def spans(self, skip=()):
+        '''(start, end, new) for every row whose text changes, except the
+        row indexes in skip.'''
+        spans = []
+        for i, (start, end, _) in enumerate(self.rows):
+            if i in skip:
+                continue
+            new = self.serialize(i)
+            if new != self.text[start:end]:
+                spans.append((start, end, new))
+        return spans
+
+
+def rounds_spans(text):
+    '''(start, end, '') removing rounds=0 from {{Swiss table/start}}.'''
+    return [(res.start(1), res.end(1), '')
+            for res in ROUNDS_RE.finditer(text)]
+
+
+# {{prize pool ...}} templates, e.g. prize pool start and slot, with at
+# most one level of templates nested in them
+PRIZE_POOL_RE = re.compile(r'\{\{ *prize *pool(?:[^{}]|\{\{[^{}]*\}\})*\}\}',
+                           re.IGNORECASE)
+LOCALPRIZE_RE = re.compile('\|localprize=([0-9]{1,3})[^0-9^\|^\n]*([\|\n])')
+PARAM_SPACE_RE = re.compile(' +([\|}])')
+
+
+def prize_pool_spans(text):
+    '''(start, end, new) for every prize pool template that changes: points
+    instead of a local currency, and no spaces before | or }}.'''
+    spans = []
+    for res in PRIZE_POOL_RE.finditer(text):
+        old = res[0]
+        new = old.replace('|localcurrency=points', '|points=CP')
+        new = LOCALPRIZE_RE.sub('|points=\g<1>\g<2>', new)
+        new = PARAM_SPACE_RE.sub('\g<1>', new)
+        if new != old:
+            spans.append((res.start(), res.end(), new))
+    return spans
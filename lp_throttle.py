@@ -0,0 +1,156 @@
+'''
+NAME:           lp_throttle.py
+AUTHOR:         AquaDragon
+DATE:           18 Oct 2026
+DESCRIPTION:    Adaptive request scheduler for the bot scripts. Every API
+                call goes through the read or the write lane of its site.
+                Each lane paces requests and limits how many run at once,
+                speeding up while the wiki answers quickly and backing off
+                on slow responses, maxlag and rate-limit errors.
+                pywikibot's own throttle (put_throttle in user-config.py)
+                still applies underneath, so it caps the write lanes.
+'''
+import contextlib
+import threading
+import time
+
+import lp_log
+import lp_stats
+from lp_lazy import pywikibot
+
+# Budget of each lane per site: (requests per minute, requests at once).
+# Liquipedia allows one API request every 2 seconds; edits go slower. On
+# commons the server fetches each uploaded sprite from GitHub, so a few
+# uploads can overlap.
+BUDGETS = {
+    'pokemon': {'read': (30, 1), 'write': (6, 1)},
+    'commons': {'read': (30, 1), 'write': (30, 4)},
+    }
+DEFAULT_BUDGET = {'read': (30, 1), 'write': (6, 1)}
+
+# A lane never slows down below this share of its budget
+FLOOR = 0.05
+
+# Responses slower than this many seconds count as the server being under
+# load. pywikibot waits out maxlag inside the call, so those are slow too.
+SLOW = 2.0
+
+# Share of the budget added to the rate after each fast response, and
+# fast responses in a row before one more request may run at once
+STEP = 0.05
+GROW = 10
+
+# API error codes that mean slow down
+BACKOFF_CODES = ('maxlag', 'ratelimited', 'readonly')
+
+
+def backs_off(err):
+    '''Whether err means the wiki wants fewer requests.'''
+    if isinstance(err, (pywikibot.exceptions.MaxlagTimeoutError,
+                        pywikibot.exceptions.ServerError)):
+        return True
+    return getattr(err, 'code', None) in BACKOFF_CODES
+
+
+class Lane:
+    '''Pace and concurrency of one kind of request to one site.
+
+    rate (requests per minute) and workers (requests at once) start at the
+    budget. They are halved after a slow response or an error from
+    backs_off(), and climb back a little after every fast one.
+    '''
+
+    def __init__(self, name, rate, workers):
+        self.name = name
+        self.max_rate = rate
+        self.max_workers = workers
+        self.rate = rate
+        self.workers = workers
+        self.active = 0
+        self.next = 0.0
+        self.fast = 0
+        self.cond = threading.Condition()
+
+    @contextlib.contextmanager
+    def request(self, kind):
+        '''Wait for a turn, then time the call as kind (see lp_stats.py)
+        and adapt to how it went.'''
+        with self.cond:
+            while self.active >= self.workers:
+                self.cond.wait()
+            self.active += 1
+            now = time.monotonic()
+            delay = self.next - now
+            self.next = max(now, self.next) + 60 / self.rate
+        try:
+            if delay > 0:
+                time.sleep(delay)
+            start = time.perf_counter()
+            try:
+                with lp_stats.STATS.timed(kind):
+                    yield
+            except Exception as err:
+                if backs_off(err):
+                    self.slow_down(err)
+                raise
+            elapsed = time.perf_counter() - start
+            if elapsed > SLOW:
+                self.slow_down('{0:.1f} s response'.format(elapsed))
+            else:
+                self.speed_up()
+        finally:
+            with self.cond:
+                self.active -= 1
+                self.cond.notify_all()
+
+    def speed_up(self):
+        with self.cond:
+            self.rate = min(self.max_rate,
+                            self.rate + self.max_rate * STEP)
+            self.fast += 1
+            if self.fast >= GROW and self.workers < self.max_workers:
+                self.workers += 1
+                self.fast = 0
+                self.cond.notify_all()
+
+    def slow_down(self, reason):
+        with self.cond:
+            self.rate = max(self.max_rate * FLOOR, self.rate / 2)
+            self.workers = max(1, self.workers // 2)
+            self.fast = 0
+            # Nothing else starts until a full interval at the new rate
+            self.next = max(self.next, time.monotonic() + 60 / self.rate)
+        lp_log.logger.info('%s: down to %.1f requests/min, %d at once (%s)',
+                           self.name, self.rate, self.workers, reason)
+
+
+class Throttle:
+    '''The read and write lanes of a site, with the site's budget.'''
+
+    def __init__(self, code, budget=None):
+        budget = budget or BUDGETS.get(code, DEFAULT_BUDGET)
+        self.read = Lane(code + ' read', *budget['read'])
+        self.write = Lane(code + ' write', *budget['write'])
+
+
+_throttles = {}
+_lock = threading.Lock()
+
+
+def get(site):
+    '''The throttle of site, shared by every thread.'''
+    with _lock:
+        if site.code not in _throttles:
+            _throttles[site.code] = Throttle(site.code)
+        return _throttles[site.code]
+
+
+def read(site, kind):
+    '''Context manager around a read request to site, e.g.
+    with lp_throttle.read(site, 'fetch'): ...'''
+    return get(site).read.request(kind)
+
+
+def write(site, kind):
+    '''Context manager around an edit, move or upload on site.'''
+    return get(site).write.request(kind)
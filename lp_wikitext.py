@@ -0,0 +1,308 @@
+'''
+NAME:           lp_wikitext.py
+AUTHOR:         AquaDragon
+DATE:           18 Oct 2026
+DESCRIPTION:    Linear-time template locator and page model for wikitext.
+                Finds templates by counting braces instead of with nested
+                regex quantifiers, so malformed pages cannot make the
+                cleanup rules backtrack exponentially. Document parses a
+                page once and keeps the index up to date as rules edit it.
+'''
+import collections
+import re
+
+# Everything that opens or closes a template, link or comment, and the
+# parameter separator. Each token is a fixed string, so one scan over the
+# page is linear in its length.
+TOKEN_RE = re.compile(r'\{\{\{|\}\}\}|\{\{|\}\}|\[\[|\]\]|\||<!--')
+
+# Characters around an edit re-scanned with it, the longest token
+MARGIN = len('<!--')
+
+SECTION_RE = re.compile(r'^(=+)[ \t]*(.*?)[ \t]*\1[ \t]*$', re.M)
+CATEGORY_RE = re.compile(r'\[\[[ \t]*Category[ \t]*:[ \t]*([^\]|\n]*?)[ \t]*'
+                         r'(?:\|[^\]\n]*)?\]\]')
+
+Section = collections.namedtuple('Section', 'level title start end')
+Category = collections.namedtuple('Category', 'name start end')
+
+
+class Param:
+    '''A template parameter. start/end span the text after the '|'.'''
+
+    def __init__(self, text, start, end):
+        self.start = start
+        self.end = end
+        raw = text[start:end]
+        key, sep, _ = raw.partition('=')
+        if sep:
+            self.name = key.strip()
+            self.value_start = start + len(key) + 1
+        else:
+            self.name = None    # positional, numbered by Template
+            self.value_start = start
+        self.value_end = end
+
+    def value(self, text):
+        return text[self.value_start:self.value_end]
+
+    def shift(self, delta):
+        self.start += delta
+        self.end += delta
+        self.value_start += delta
+        self.value_end += delta
+
+    def __repr__(self):
+        return 'Param({0!r}, {1}-{2})'.format(self.name, self.start,
+                                              self.end)
+
+
+class Template:
+    '''A {{template}} found in the text. start/end span the braces.'''
+
+    def __init__(self, text, start, end, separators):
+        self.start = start
+        self.end = end
+        bounds = [start + 2] + separators + [end - 2]
+        self.name = text[bounds[0]:bounds[1]].strip()
+        self.params = []
+        position = 0
+        for ii in range(1, len(bounds) - 1):
+            param = Param(text, bounds[ii] + 1, bounds[ii + 1])
+            if param.name is None:
+                position += 1
+                param.name = str(position)
+            self.params.append(param)
+
+    def param(self, name):
+        '''First parameter with this name, or None.'''
+        for param in self.params:
+            if param.name == name:
+                return param
+        return None
+
+    def get(self, text, name, default=None):
+        '''Stripped value of a parameter, or default if it is missing.'''
+        param = self.param(name)
+        if param is None:
+            return default
+        return param.value(text).strip()
+
+    def shift(self, delta):
+        self.start += delta
+        self.end += delta
+        for param in self.params:
+            param.shift(delta)
+
+    def __repr__(self):
+        return 'Template({0!r}, {1}-{2})'.format(self.name, self.start,
+                                                 self.end)
+
+
+def find_templates(text):
+    '''All templates in text, in order of their start offset. Unclosed
+    braces are ignored rather than swallowing the rest of the page.'''
+    return _scan(text, 0, len(text))[0]
+
+
+def _scan(text, start, end):
+    # Scan text[start:end] for templates. Also returns whether every brace,
+    # link and comment opened in the range was closed in it, which tells
+    # Document whether a partial re-scan is safe.
+    found = []
+    # Open templates and links as (token, start, separators); separators
+    # is None for links and {{{parameters}}}
+    stack = []
+    balanced = True
+    pos = start
+    while True:
+        res = TOKEN_RE.search(text, pos, end)
+        if res is None:
+            break
+        token = res[0]
+        pos = res.end()
+
+        if token == '<!--':
+            # Skip comments, braces in them do not count
+            close = text.find('-->', pos, end)
+            if close < 0:
+                balanced = False
+                break
+            pos = close + 3
+        elif token in ('{{', '[[', '{{{'):
+            stack.append((token, res.start(), [] if token == '{{' else None))
+        elif token == '|':
+            if stack and stack[-1][0] == '{{':
+                stack[-1][2].append(res.start())
+        else:
+            if token == '}}}':
+                # '}}}}' is two templates closing more often than a
+                # {{{parameter}}}: like MediaWiki, read '}}' if the
+                # innermost open brace is a template and scan the last
+                # '}' again
+                for kind, _, _ in reversed(stack):
+                    if kind != '[[':
+                        if kind == '{{':
+                            token = '}}'
+                            pos = res.start() + 2
+                        break
+            opener = {'}}': '{{', ']]': '[[', '}}}': '{{{'}[token]
+            # Drop frames left open inside this one, e.g. a stray '[['
+            depth = len(stack) - 1
+            while depth >= 0 and stack[depth][0] != opener:
+                depth -= 1
+            if depth < 0:
+                balanced = False
+                continue
+            if depth < len(stack) - 1:
+                balanced = False
+            del stack[depth + 1:]
+            kind, opened, separators = stack.pop()
+            if kind == '{{':
+                found.append(Template(text, opened, pos, separators))
+
+    found.sort(key=lambda template: template.start)
+    return found, balanced and not stack
+
+
+def templates_named(text, name, templates=None):
+    '''Templates called name, e.g. 'Tabs static'. Magic words such as
+    DISPLAYTITLE match on the part before the colon.'''
+    if templates is None:
+        templates = find_templates(text)
+    return [template for template in templates
+            if template.name == name or
+            template.name.partition(':')[0] == name]
+
+
+def replace_spans(text, spans):
+    '''Replace (start, end, new) spans of text. Spans must not overlap.'''
+    parts = []
+    pos = 0
+    for start, end, new in sorted(spans, key=lambda span: span[0]):
+        parts.append(text[pos:start])
+        parts.append(new)
+        pos = end
+    parts.append(text[pos:])
+    return ''.join(parts)
+
+
+def after_newline(text, pos):
+    '''pos, moved past the newline if one directly follows it.'''
+    return pos + 1 if text.startswith('\n', pos) else pos
+
+
+class Document:
+    '''A page parsed once: its templates with parameter offsets, section
+    headers and categories.
+
+    Edits go through replace() (or the helpers built on it), which only
+    re-scans the top-level templates the edit touched and shifts the
+    offsets of everything after it. Section headers and categories are
+    found again the next time they are asked for.
+    '''
+
+    def __init__(self, text):
+        self.text = text
+        self.templates = find_templates(text)
+        self._sections = None
+        self._categories = None
+
+    def templates_named(self, name):
+        return templates_named(self.text, name, self.templates)
+
+    def first(self, name):
+        '''The first template called name, or None.'''
+        found = self.templates_named(name)
+        return found[0] if found else None
+
+    @property
+    def sections(self):
+        if self._sections is None:
+            self._sections = [Section(len(res[1]), res[2], res.start(),
+                                      res.end())
+                              for res in SECTION_RE.finditer(self.text)]
+        return self._sections
+
+    @property
+    def categories(self):
+        if self._categories is None:
+            self._categories = [Category(res[1], res.start(), res.end())
+                                for res in CATEGORY_RE.finditer(self.text)]
+        return self._categories
+
+    def has_section(self, title):
+        return any(section.title == title for section in self.sections)
+
+    def replace(self, spans):
+        '''Replace (start, end, new) spans, update the index and return
+        the new text. Spans must not overlap.'''
+        spans = sorted(spans, key=lambda span: span[0])
+        if not spans:
+            return self.text
+        text = replace_spans(self.text, spans)
+        delta = len(text) - len(self.text)
+
+        # Widen the edited range by a token on each side, since the new
+        # text can join with what is around it (e.g. '}' + '}}'), and then
+        # to the top-level templates it touches, those are the only ones
+        # whose structure can have changed
+        lo = max(0, spans[0][0] - MARGIN)
+        hi = min(len(self.text), max(span[1] for span in spans) + MARGIN)
+        for template in self._top_level():
+            if template.start < hi and template.end > lo:
+                lo = min(lo, template.start)
+                hi = max(hi, template.end)
+
+        middle, balanced = _scan(text, lo, hi + delta)
+        # A brace right outside the range could pair up differently now,
+        # and a comment opened or closed by the edit hides or uncovers
+        # text outside it
+        edges = text[lo - 1:lo] + text[hi + delta:hi + delta + 1]
+        local = balanced and not any(char in '{}[]' for char in edges)
+        for mark in ('<!--', '-->'):
+            reach = len(mark) - 1
+            start = max(0, lo - reach)
+            local = local and mark not in self.text[start:hi + reach] \
+                and mark not in text[start:hi + delta + reach]
+        if local and text.rfind('<!--', 0, lo) > text.rfind('-->', 0, lo):
+            # The range is inside a comment
+            local = False
+        if local:
+            before = [template for template in self.templates
+                      if template.end <= lo]
+            after = [template for template in self.templates
+                     if template.start >= hi]
+            for template in after:
+                template.shift(delta)
+            self.templates = before + middle + after
+            self.templates.sort(key=lambda template: template.start)
+        else:
+            # The edit may have changed something outside its range
+            self.templates = find_templates(text)
+
+        self.text = text
+        self._sections = None
+        self._categories = None
+        return text
+
+    def _top_level(self):
+        end = -1
+        for template in self.templates:
+            if template.start >= end:
+                end = template.end
+                yield template
+
+    def set_value(self, param, value):
+        '''Set a parameter value, keeping the whitespace after it.'''
+        old = param.value(self.text)
+        stripped = old.rstrip()
+        return self.replace([(param.value_start,
+                              param.value_start + len(stripped), value)])
+
+    def remove_param(self, param):
+        '''Remove a parameter together with its '|'.'''
+        return self.replace([(param.start - 1, param.end, '')])
+
+    def insert(self, pos, new):
+        return self.replace([(pos, pos, new)])
@@ -3,44 +3,153 @@ NAME:           move_lc_pages.py
 AUTHOR:         AquaDragon
 DATE:           27 Mar 2021
 DESCRIPTION:    Script for moving League Cup pages on Pokémon Liquipedia.
+
+USAGE:          python move_lc_pages.py plan   # write move_plan.json
+                python move_lc_pages.py move   # carry it out, resumable
 '''
-from datetime import date, datetime
-import re
+import argparse
+from datetime import date
+import json
+
+import lp_cache
+import lp_pages
+import lp_save
+import lp_throttle
+from lp_lazy import pywikibot
 
-import pywikibot
-import pywikibot.pagegenerators
+# Where the planned moves and their progress are kept
+PLAN = 'move_plan.json'
 
-# Define the wiki site
-lpwiki = pywikibot.Site(code='pokemon', fam='liquipedia')
+REASON = 'consistent formatting of tournament URL'
 
 
 # List all the pages to be edited
 def catpage(var=None):
+    lpwiki = lp_pages.get_site()
     if var is None:
-        return pywikibot.pagegenerators.CategorizedPageGenerator(
-            pywikibot.Category(lpwiki, 'Category:Tier_3_Tournaments'),
-            recurse=False, namespaces=[0], start='Pokemon League Cup/')
+        # Moves do not need the page text, only the titles
+        return lp_pages.category_pages(
+            lpwiki, 'Category:Tier_3_Tournaments',
+            start='Pokemon League Cup/', content=False)
     else:
         return [pywikibot.Page(lpwiki, "test")]
 
 
-# Edit individual pages
-for page in catpage(None):
-    # use dir() to load properties
-    title_old = page.title()
-
+def new_title(title):
+    '''The new title for a League Cup page, or None for other pages. Raises
+    ValueError if the title is not <name>/<location>/<valid date>.'''
     # Dissect the page title, then reformat
-    if page.title().partition('/')[0] == 'Pokemon League Cup':
-        lc, loc, date = page.title().rsplit('/')
-        dd, mm, yy = date.split('-')
+    if title.partition('/')[0] != 'Pokemon League Cup':
+        return None
+    lc, loc, dd = title.split('/')
+    dd, mm, yy = dd.split('-')
+
+    if len(yy) == 2:
+        yy = '20{0}'.format(yy)
+    date(int(yy), int(mm), int(dd))
+
+    return 'Pokemon Championships/League Cup/{0}/{1}-{2}-{3}'.\
+           format(loc, yy, mm, dd)
+
+
+def plan(titles, site):
+    '''Work out every move before making any. Returns the plan as
+    {'moves': [[old, new, status]], 'problems': [[old, new, reason]]};
+    moves with a problem are left out.'''
+    moves = {}
+    problems = []
+    for title in titles:
+        try:
+            new = new_title(title)
+        except ValueError as err:
+            problems.append([title, None, 'bad title: {0}'.format(err)])
+            continue
+        if new is not None:
+            moves[title] = new
+
+    # Two pages that would end up at the same title
+    targets = {}
+    for old, new in moves.items():
+        targets.setdefault(new, []).append(old)
+    for new, olds in targets.items():
+        if len(olds) > 1:
+            for old in olds:
+                problems.append([old, new, 'collides with {0}'.format(
+                    ', '.join(other for other in olds if other != old))])
+                del moves[old]
+
+    # Targets that already exist, checked all at once
+    exists = lp_pages.exists_many(site, list(moves.values()))
+    for old, new in list(moves.items()):
+        if exists[new]:
+            problems.append([old, new, 'target exists'])
+            del moves[old]
+
+    return {'moves': [[old, new, 'todo'] for old, new in moves.items()],
+            'problems': problems}
+
 
-        if len(yy) == 2:
-            yy = '20{0}'.format(yy)
+def write_plan(path, data):
+    lp_cache.write_json(path, data, indent=1)
 
-        title_new = 'Pokemon Championships/League Cup/{0}/{1}-{2}-{3}'.\
-                    format(loc, yy, mm, dd)
 
-        print('page move: {0} >>>> {1}'.format(title_old, title_new))
+def move(site, old, new, retries=lp_save.RETRIES,
+         retry_wait=lp_save.RETRY_WAIT):
+    '''Move old to new, return an error message or None. The site's write
+    lane (see lp_throttle.py) paces the moves; maxlag and server errors
+    are retried.'''
+    page = pywikibot.Page(site, old)
+
+    def call():
+        with lp_throttle.write(site, 'move'):
+            page.move(new, reason=REASON, noredirect=True)
+
+    try:
+        lp_save.retry(call, retries, retry_wait)
+    except Exception as err:
+        return str(err)
+    return None
+
+
+def execute(site, path):
+    '''Carry out the moves in the plan at path. Progress is written back
+    after every move, so an interrupted run carries on where it stopped.'''
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+
+    todo = [entry for entry in data['moves'] if entry[2] != 'done']
+    print('!! {0} of {1} moves left'.format(len(todo), len(data['moves'])))
+    failed = 0
+    for entry in todo:
+        old, new, _ = entry
+        print('page move: {0} >>>> {1}'.format(old, new))
+        error = move(site, old, new)
+        entry[2] = 'done' if error is None else 'failed: ' + error
+        failed += error is not None
+        write_plan(path, data)
+
+    print('\n!! Moved {0} pages, {1} failed'.format(len(todo) - failed,
+                                                    failed))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Move League Cup pages.')
+    parser.add_argument('step', choices=['plan', 'move'])
+    parser.add_argument('--plan', default=PLAN, metavar='FILE',
+                        help='plan file (default {0})'.format(PLAN))
+    args = parser.parse_args(argv)
+
+    lpwiki = lp_pages.get_site()
+    if args.step == 'plan':
+        data = plan((page.title() for page in catpage(None)), lpwiki)
+        write_plan(args.plan, data)
+        for old, new, reason in data['problems']:
+            print('!! {0}: {1}'.format(old, reason))
+        print('\n!! {0} moves planned, {1} problems, see {2}'.format(
+            len(data['moves']), len(data['problems']), args.plan))
+    else:
+        execute(lpwiki, args.plan)
+
 
-        page.move(title_new, reason='consistent formatting of tournament URL',
-                  noredirect=True)
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,6 @@
+# The scripts are top-level modules in the repository root, not a package;
+# make them importable whichever directory pytest is started from
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,125 @@
+import unittest
+
+from lp_tables import (SwissTable, prize_pool_spans, rounds_spans,
+                       row_params)
+from lp_wikitext import replace_spans
+
+
+def rewrite(text):
+    '''text with every readable Swiss row in the positional form.'''
+    table = SwissTable(text)
+    bad = table.normalize()
+    return replace_spans(text, table.spans(skip={i for i, _ in bad}))
+
+
+class RowParamsTest(unittest.TestCase):
+
+    def test_named_and_positional(self):
+        self.assertEqual(row_params('| place = 1 |flag=us|Ash|win_m=3'),
+                         {'place': '1', 'flag': 'us', '1': 'Ash',
+                          'win_m': '3'})
+
+    def test_links_and_templates(self):
+        # The | and = inside a link or a nested template stay in the value
+        self.assertEqual(row_params('|[[Ash|A]]|{{Player|B|flag=us}}|x=1'),
+                         {'1': '[[Ash|A]]', '2': '{{Player|B|flag=us}}',
+                          'x': '1'})
+
+
+class SwissTableTest(unittest.TestCase):
+
+    def test_named_row(self):
+        text = ('{{Swiss table/row|place=1|flag=us|Ash|win_m=3|lose_m=1|'
+                'tie_m=0|opw%=55.5%|oopw%=50%}}')
+        self.assertEqual(rewrite(text),
+                         '{{Swiss table/row|1| |us|Ash|3|1|0|55.5|50}}')
+
+    def test_positional_row(self):
+        text = '{{Swiss table/row|1| |us|Ash|3|1|0|55.5%|50}}'
+        self.assertEqual(rewrite(text),
+                         '{{Swiss table/row|1| |us|Ash|3|1|0|55.5|50}}')
+        unchanged = '{{Swiss table/row|1| |us|Ash|3|1|0|55.5|50}}'
+        self.assertEqual(SwissTable(unchanged).spans(), [])
+
+    def test_link_and_template_rows(self):
+        text = ('{{Swiss table/row|place=1|flag=us|[[Ash|A]]|win_m=3|'
+                'lose_m=1|tie_m=0|opw%=55%|oopw%=50%}}\n'
+                '{{Swiss table/row|place=2|flag=us|{{Player|Foo}}|win_m=3|'
+                'lose_m=1|tie_m=0|opw%=50%|oopw%=50%}}')
+        self.assertEqual(rewrite(text),
+                         '{{Swiss table/row|1| |us|[[Ash|A]]|3|1|0|55|50}}\n'
+                         '{{Swiss table/row|2| |us|{{Player|Foo}}|3|1|0|50|'
+                         '50}}')
+
+    def test_padded_percent(self):
+        text = ('{{Swiss table/row| place = 1 |flag=us|Ash|win_m=3|lose_m=1|'
+                'tie_m=0|opw%=55.0% |oopw%= 50% }}\n'
+                '{{Swiss table/row|2| |us|Brock|3|1|0|40% |40}}')
+        table = SwissTable(text)
+        self.assertEqual(table.normalize(), [])
+        self.assertEqual(table.columns['opw%'], ['55.0', '40'])
+        self.assertEqual(rewrite(text),
+                         '{{Swiss table/row|1| |us|Ash|3|1|0|55.0|50}}\n'
+                         '{{Swiss table/row|2| |us|Brock|3|1|0|40|40}}')
+
+    def test_bad_percent(self):
+        text = ('{{Swiss table/row|place=1|flag=us|Ash|win_m=3|lose_m=1|'
+                'tie_m=0|opw%=5%%|oopw%=50%}}')
+        table = SwissTable(text)
+        self.assertEqual(table.normalize(), [(0, "opw% '5%'")])
+        # Left in the named form
+        self.assertEqual(rewrite(text), text)
+
+    def test_skipped(self):
+        text = ('{{Swiss table/row|place=1|bogus=2}}\n'
+                '{{Swiss table/row|{{a|{{b}}}}|x}}')
+        table = SwissTable(text)
+        self.assertEqual(table.rows, [])
+        self.assertEqual(table.skipped, [(0, 'unexpected parameters'),
+                                         (36, 'cannot be read')])
+
+    def test_matches_played(self):
+        rows = ['{{{{Swiss table/row|{0}| |us|P{0}|{1}|{2}|0|50|50}}}}'.format(
+            place, wins, losses) for place, wins, losses in
+            [(1, 3, 1), (2, 2, 2), (3, 4, 1), (4, 'x', 1)]]
+        problems = SwissTable('\n'.join(rows)).validate()
+        self.assertEqual(problems, [(3, 'W/L/T x/1/0'),
+                                    (2, '5 matches, most played 4')])
+
+    def test_place_order(self):
+        rows = ['{{{{Swiss table/row|{0}| |us|P|3|1|0|50|50}}}}'.format(place)
+                for place in (1, 3, 2, 'T4')]
+        problems = SwissTable('\n'.join(rows)).validate()
+        self.assertEqual(problems, [(2, 'place 2 after 3'),
+                                    (3, "place 'T4'")])
+
+    def test_percent_range(self):
+        text = '{{Swiss table/row|1| |us|Ash|3|1|0|101|abc}}'
+        self.assertEqual(SwissTable(text).validate(),
+                         [(0, "opw% '101'"), (0, "oopw% 'abc'")])
+
+
+class SpansTest(unittest.TestCase):
+
+    def test_rounds(self):
+        text = '{{Swiss table/start|rounds=0}}{{Swiss table/start|rounds=05}}'
+        self.assertEqual(replace_spans(text, rounds_spans(text)),
+                         '{{Swiss table/start}}'
+                         '{{Swiss table/start|rounds=05}}')
+
+    def test_localprize(self):
+        text = ('{{prize pool slot|place=1|localprize=100 pts |'
+                'localcurrency=points}}\n'
+                '{{other|localprize=100 pts|}}')
+        self.assertEqual(replace_spans(text, prize_pool_spans(text)),
+                         '{{prize pool slot|place=1|points=100|'
+                         'points=CP}}\n'
+                         '{{other|localprize=100 pts|}}')
+
+    def test_prize_pool_unchanged(self):
+        text = '{{Prize pool start|points=CP}}'
+        self.assertEqual(prize_pool_spans(text), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import random
+import unittest
+
+from lp_wikitext import Document, find_templates, templates_named
+
+
+def spans(templates):
+    return [(template.name, template.start, template.end)
+            for template in templates]
+
+
+class FindTemplatesTest(unittest.TestCase):
+
+    def test_nested(self):
+        text = '{{a|x={{b|y}}|z}}'
+        self.assertEqual(spans(find_templates(text)),
+                         [('a', 0, 17), ('b', 6, 13)])
+
+    def test_params(self):
+        template = find_templates('{{a| x = 1 |two|y=}}')[0]
+        self.assertEqual([param.name for param in template.params],
+                         ['x', '1', 'y'])
+        self.assertEqual(template.get('{{a| x = 1 |two|y=}}', 'x'), '1')
+
+    def test_closing_together(self):
+        # '}}}}' closes two templates, not a {{{parameter}}} and a '}'
+        self.assertEqual(spans(find_templates('{{a|{{b}}}}')),
+                         [('a', 0, 11), ('b', 4, 9)])
+        text = '{{Infobox player\n|id=X\n|country={{flag|us}}}}'
+        info = templates_named(text, 'Infobox player')
+        self.assertEqual(len(info), 1)
+        self.assertEqual(info[0].get(text, 'country'), '{{flag|us}}')
+
+    def test_parameter_inside_template(self):
+        self.assertEqual(spans(find_templates('{{a|{{{1}}}}}')),
+                         [('a', 0, 13)])
+        self.assertEqual(spans(find_templates('{{a|{{{1|{{b}}}}}}}')),
+                         [('a', 0, 19), ('b', 9, 14)])
+
+    def test_links_and_comments(self):
+        text = '{{a|[[b|c]]|<!-- {{d}} | -->e}}'
+        template = find_templates(text)[0]
+        self.assertEqual(len(find_templates(text)), 1)
+        self.assertEqual([param.name for param in template.params],
+                         ['1', '2'])
+
+    def test_unclosed(self):
+        # An unclosed template does not swallow the rest of the page
+        self.assertEqual(spans(find_templates('{{a|{{b}}\n{{c}}')),
+                         [('b', 4, 9), ('c', 10, 15)])
+        self.assertEqual(find_templates('}}}{{|'), [])
+
+    def test_magic_word(self):
+        text = '{{DISPLAYTITLE:A B}}'
+        self.assertEqual(len(templates_named(text, 'DISPLAYTITLE')), 1)
+
+
+def index(templates):
+    return [(template.name, template.start, template.end,
+             [(param.name, param.start, param.end, param.value_start)
+              for param in template.params])
+            for template in templates]
+
+
+class DocumentTest(unittest.TestCase):
+    '''The index Document keeps up to date must match a fresh parse.'''
+
+    def assertIndexed(self, doc):
+        self.assertEqual(index(doc.templates), index(find_templates(doc.text)))
+
+    def test_set_value(self):
+        doc = Document('x\n{{a|b=1|c={{d|2}}}}\n{{e|f=3}}')
+        doc.set_value(doc.first('a').param('b'), '{{g|4}}')
+        self.assertIndexed(doc)
+        doc.set_value(doc.first('e').param('f'), '')
+        self.assertIndexed(doc)
+
+    def test_remove_param(self):
+        doc = Document('{{a|b=1|c={{d|2}}}}{{e}}')
+        doc.remove_param(doc.first('a').param('c'))
+        self.assertIndexed(doc)
+        self.assertEqual(doc.text, '{{a|b=1}}{{e}}')
+
+    def test_insert(self):
+        doc = Document('{{a|b=1}}\n{{c}}')
+        doc.insert(doc.first('a').param('b').end, '|x={{y}}\n')
+        self.assertIndexed(doc)
+        doc.insert(0, '{{z}}')
+        self.assertIndexed(doc)
+
+    def test_edit_joins_braces(self):
+        # Removing both DISPLAYTITLEs leaves '}}' + '}' next to each other
+        text = ('{{Infobox player\n|id=A B\n|country=US\n'
+                '{{DISPLAYTITLE:A B}}\n}}{{DISPLAYTITLE:A B}}\n}')
+        doc = Document(text)
+        doc.replace([(template.start, template.end + 1, '')
+                     for template in doc.templates_named('DISPLAYTITLE')])
+        self.assertIndexed(doc)
+
+    def test_edit_opens_template(self):
+        doc = Document('{{a}} text {{b}}')
+        doc.replace([(5, 6, '{{')])
+        self.assertIndexed(doc)
+        doc = Document('{{a}} x}} {{b}}')
+        doc.replace([(0, 0, '{{c|')])
+        self.assertIndexed(doc)
+
+    def test_random_edits(self):
+        rng = random.Random(0)
+        pieces = ['{{', '}}', '{{{', '}}}', '[[', ']]', '|', '=', 'a', ' ',
+                  '\n', '<!--', '-->', '{', '}']
+        for _ in range(2000):
+            text = ''.join(rng.choice(pieces) for _ in range(30))
+            doc = Document(text)
+            for _ in range(3):
+                start = rng.randrange(len(doc.text) + 1)
+                end = min(len(doc.text), start + rng.randrange(4))
+                new = ''.join(rng.choice(pieces)
+                              for _ in range(rng.randrange(3)))
+                doc.replace([(start, end, new)])
+                self.assertIndexed(doc)
+
+
+if __name__ == '__main__':
+    unittest.main()
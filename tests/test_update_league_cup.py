@@ -0,0 +1,81 @@
+import unittest
+
+import lp_rules
+from update_league_cup import RULES
+
+
+def clean(title, text):
+    return lp_rules.apply(RULES, text, lp_rules.Context(title, text))
+
+
+class LeagueCupTest(unittest.TestCase):
+
+    def test_full_page(self):
+        text = ('{{Infobox league\n'
+                '|name=Pokémon League Cup - Portland, Oregon 15-02-2020\n'
+                '|shortname=Pokémon League Cup - Portland, Oregon '
+                '15-02-2020\n'
+                '|city=Portland\n|country=United States\n|date=2020-02-15\n'
+                '|game=VGC\n|format=Swiss  \n|liquipediatier=Weekly\n}}\n\n'
+                '==Format==\nSwiss rounds.\n\n'
+                '==Prize Pool==\n'
+                '{{prize pool start|localcurrency=points}}\n'
+                '{{prize pool slot|place=1|localprize=50 CP |usdprize=0}}\n'
+                '{{prize pool end}}\n\n'
+                '==Results==\n{{Swiss table/start|rounds=0}}\n'
+                '{{Swiss table/row|place=1|flag=us|{{Player|Ash}}|win_m=4|'
+                'lose_m=1|tie_m=0|opw%=60.5%|oopw%=55%}}\n'
+                '{{Swiss table/row|place=2|flag=us|[[Misty|M]]|win_m=3|'
+                'lose_m=2|tie_m=0|opw%=58% |oopw%=54%}}\n'
+                '{{Swiss table/end}}')
+        title = 'Pokemon League Cup/Portland/15-02-2020'
+        self.assertEqual(clean(title, text), (
+            '{{Infobox league\n'
+            '|name=Pokémon League Cup - Portland, Oregon 15-02-2020\n'
+            '|city=Portland, Oregon\n|country=United States\n'
+            '|date=2020-02-15\n|game=TCG\n|format=Swiss\n'
+            '|series=Pokémon League Cup\n|liquipediatier=3\n}}\n\n'
+            "The '''Portland League Cup''' was a trading card game "
+            'tournament held at Portland, Oregon of the United States on '
+            '15 February 2020. The event was part of the Pokémon '
+            'Championship Series where players earn Championship Points '
+            '(CP) in order to qualify for the '
+            '{{series|worlds|Pokémon World Championships}}.\n\n'
+            '==Tournament Details==\n===Format===\nSwiss rounds.\n\n'
+            '==Prize Pool==\n{{prize pool start|points=CP}}\n'
+            '{{prize pool slot|place=1|points=50|usdprize=0}}\n'
+            '{{prize pool end}}\n\n'
+            '==Results==\n===Swiss Rounds Standings===\n'
+            '{{Swiss table/start}}\n'
+            '{{Swiss table/row|1| |us|{{Player|Ash}}|4|1|0|60.5|55}}\n'
+            '{{Swiss table/row|2| |us|[[Misty|M]]|3|2|0|58|54}}\n'
+            '{{Swiss table/end}}\n\n==References==\n{{Reflist}}',
+            ['Removed end-of-line whitespaces', 'Updated city with state',
+             'Removed shortname', 'Set game=TCG', 'Added series name',
+             'Changed to Tier 3', "Sectioned 'Tournament Details'",
+             'Updated Results section headers', 'Added description',
+             'Updated prize pool templates', 'Updated swiss standings table',
+             'Appended reference section']))
+
+    def test_swiss_warnings(self):
+        text = ('{{Swiss table/start}}\n'
+                '{{Swiss table/row|place=1|flag=us|A|win_m=3|lose_m=1|'
+                'tie_m=0|opw%=5%%|oopw%=50%}}\n'
+                '{{Swiss table/row|place=2|bogus=1}}\n'
+                '{{Swiss table/end}}\n==References==\n{{Reflist}}')
+        with self.assertLogs('lp', 'WARNING') as logs:
+            self.assertEqual(clean('T', text), (text, []))
+        self.assertEqual(logs.output, [
+            "WARNING:lp:T: Swiss row 1: opw% '5%'",
+            'WARNING:lp:T: Swiss row on line 3 left as is: unexpected '
+            'parameters'])
+
+    def test_missing_date(self):
+        # add_description needs the date, the page is skipped
+        text = '{{Infobox league\n|name=X\n}}\n==Format==\n'
+        with self.assertRaises(lp_rules.RuleError):
+            clean('Pokemon League Cup/X/15-02-2020', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+
+import lp_rules
+from update_player_page import RULES
+
+
+def clean(title, text, exists=()):
+    ctx = lp_rules.Context(title, text, exists=set(exists).__contains__)
+    return lp_rules.apply(RULES, text, ctx)
+
+
+class PlayerPageTest(unittest.TestCase):
+
+    def test_full_page(self):
+        text = ('{{Tabs static\n|name1=Overview\n|link1=Ash Ketchum\n'
+                '|name2=Results\n|link2=Ash Ketchum/Results\n}}\n'
+                '{{DISPLAYTITLE:Ash Ketchum}}\n'
+                '{{Infobox player\n |id=Ash Ketchum\n'
+                '|country=United States\n'
+                '|twitter=https://twitter.com/ash\n'
+                '|youtube=channel/UC123\n}}\n\n\n'
+                'Trainer Ash Ketchum is a Pokémon VGC player.  \n')
+        self.assertEqual(clean('Ash Ketchum', text), (
+            '{{PlayerTabsHeader}}\n'
+            '{{Infobox player\n|id=Ash Ketchum\n|country=United States\n'
+            '|games_played=VGC\n|twitter=ash\n|youtube=channel/UC123\n}}\n\n'
+            "Trainer '''Ash Ketchum''' is a Pokémon VGC player.\n\n\n"
+            '==References== \n{{Reflist}}',
+            ['Removed excess newlines', 'Removed template indentation',
+             'Removed end-of-line whitespaces',
+             'Switched tabs to "PlayerTabsHeader" template',
+             'Removed DISPLAYTITLE', 'Set games_played=VGC',
+             'Bold player name/alias', 'Removed social media URL prefix',
+             'Added reference section']))
+
+    def test_broadcaster(self):
+        text = ('{{Tabs static\n|name1=Overview\n|link1=Misty\n'
+                '|name2=Results\n|link2=Misty/Results\n'
+                '|name3=Broadcasts\n|link3=Misty/Broadcasts\n}}\n'
+                '==References==\n{{Reflist}}')
+        expected = ('{{PlayerTabsHeader|broadcaster=yes}}\n'
+                    '==References==\n{{Reflist}}')
+        self.assertEqual(
+            clean('Misty', text, exists=['Misty/Broadcasts']),
+            (expected, ['Switched tabs to "PlayerTabsHeader" Template']))
+        # Without the Broadcasts page, the plain header
+        self.assertEqual(
+            clean('Misty', text),
+            ('{{PlayerTabsHeader}}\n==References==\n{{Reflist}}',
+             ['Switched tabs to "PlayerTabsHeader" template']))
+
+    def test_games_played(self):
+        text = ('{{Infobox player\n|id=Brock\n|country=Japan\n}}\n'
+                'Brock plays Pokémon TCG as a player and Pokémon VGC as '
+                'a player.\n==References==\n{{Reflist}}')
+        new, edits = clean('Brock', text)
+        self.assertIn('|country=Japan\n|games_played=TCG, VGC\n}}', new)
+        self.assertEqual(edits, ['Set games_played=TCG, VGC'])
+
+    def test_tcg_player(self):
+        text = ('{{Infobox player\n|id=Gary Oak\n|country=Japan\n'
+                '|games_played=\n}}\n'
+                "'''Gary Oak''' is a [[:Category:Pokémon|Pokémon]] player."
+                '\n==References==\n{{Reflist}}')
+        new, edits = clean('Gary Oak', text)
+        self.assertIn('[[:Category:Pokémon|Pokémon]] Pokémon TCG player.',
+                      new)
+        self.assertEqual(edits, ['Identified TCG player'])
+
+    def test_displaytitle_kept(self):
+        # Only a DISPLAYTITLE equal to the id is redundant
+        text = ('{{DISPLAYTITLE:ash ketchum}}\n{{Infobox player\n'
+                '|id=Ash Ketchum\n|games_played=VGC\n}}\n'
+                '==References==\n{{Reflist}}')
+        self.assertEqual(clean('Ash Ketchum', text), (text, []))
+
+    def test_reference_section(self):
+        text = 'Text.\n==Reference==\n{{Reflist}}'
+        self.assertEqual(clean('X', text),
+                         ('Text.\n==References==\n{{Reflist}}',
+                          ['Update References']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+import lp_rules
+from update_results_page import RULES
+
+
+def clean(title, text, exists=()):
+    ctx = lp_rules.Context(title, text, exists=set(exists).__contains__)
+    return lp_rules.apply(RULES, text, ctx)
+
+
+class ResultsPageTest(unittest.TestCase):
+
+    def test_full_page(self):
+        text = ('{{Tabs static\n|name1=Overview\n|link1=Ash Ketchum\n'
+                '|name2=Results\n|link2=Ash Ketchum/Results\n}}\n'
+                '__NOTOC__\n{{DISPLAYTITLE:Ash Ketchum}}\n'
+                '{{Player results table\n |year=2019\n}}\n'
+                '==Detailed Results==\ntext')
+        self.assertEqual(clean('Ash Ketchum/Results', text), (
+            '{{DISPLAYTITLE:Ash Ketchum}}\n{{PlayerTabsHeader}}\n\n'
+            '{{Player results table\n|year=2019\n}}\n\n'
+            '==Detailed Results==\ntext',
+            ['Removed template indentation',
+             'Switched tabs to "PlayerTabsHeader" template',
+             'Moved DISPLAYTITLE to top', 'Removed __NOTOC__',
+             'Added newline before section header']))
+
+    def test_broadcaster(self):
+        text = ('{{Tabs static\n|name1=Overview\n|link1=Misty\n'
+                '|name2=Results\n|link2=Misty/Results\n'
+                '|name3=Broadcasts\n}}\n\n==Detailed Results==')
+        self.assertEqual(
+            clean('Misty/Results', text, exists=['Misty/Broadcasts']),
+            ('{{PlayerTabsHeader|broadcaster=yes}}\n\n==Detailed Results==',
+             ['Removed end-of-line whitespaces',
+              'Switched tabs to "PlayerTabsHeader" Template',
+              'Added newline before section header']))
+
+    def test_whitespace(self):
+        text = 'a \n\n\n\nb\n\n c'
+        self.assertEqual(clean('X/Results', text),
+                         ('a\n\nb\nc',
+                          ['Removed excessive newline skips',
+                           'Removed end-of-line whitespaces']))
+
+    def test_unchanged(self):
+        text = '{{DISPLAYTITLE:Misty}}\n{{PlayerTabsHeader}}\ntext'
+        self.assertEqual(clean('Misty/Results', text), (text, []))
+
+
+if __name__ == '__main__':
+    unittest.main()
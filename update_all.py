@@ -0,0 +1,83 @@
+'''
+NAME:           update_all.py
+AUTHOR:         AquaDragon
+DATE:           18 Oct 2026
+DESCRIPTION:    Runs the player, results and League Cup cleanups in a single
+                pass. Each page is fetched and saved once, with the rules of
+                every script whose category lists it and one edit summary.
+'''
+import argparse
+import itertools
+
+import lp_bot
+import lp_checkpoint
+import lp_log
+import lp_pages
+import lp_stats
+from lp_rules import RuleSets
+import update_league_cup
+import update_player_page
+import update_results_page
+
+# (name, category, rules, keep(page) for the pages to take in order)
+SCRIPTS = [
+    ('player', update_player_page.CATEGORY, update_player_page.RULES, None),
+    ('results', update_results_page.CATEGORY, update_results_page.RULES,
+     None),
+    ('league_cup', update_league_cup.CATEGORY, update_league_cup.RULES,
+     update_league_cup.before_rose_tower),
+    ]
+
+
+def catpages(site, listed, checkpoint=None):
+    '''Every page of the scripts' categories once, text preloaded. listed
+    is filled with {title: names of the scripts listing the page}.'''
+    # All categories are listed before any page is cleaned up, so a page
+    # gets the rules of every category it is in
+    pages = []
+    for name, category, _, keep in SCRIPTS:
+        gen = lp_pages.category_pages(site, category, content=False)
+        if keep is not None:
+            gen = itertools.takewhile(keep, gen)
+        for page in gen:
+            title = page.title()
+            if title not in listed:
+                listed[title] = set()
+                pages.append(page)
+            listed[title].add(name)
+
+    gen = iter(pages)
+    if checkpoint is not None:
+        gen = lp_pages.skip_unchanged(gen, checkpoint)
+    return lp_pages.preload(gen, info=checkpoint is not None)
+
+
+def rulesets(listed):
+    '''The scripts' rules, each for the pages its category lists.'''
+    return RuleSets([
+        (lambda title, name=name: name in listed.get(title, ()), rules)
+        for name, _, rules, _ in SCRIPTS])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Clean up player, results and League Cup pages.')
+    parser.add_argument('-n', '--dry-run', action='store_true',
+                        help='save nothing, only log the edits and report '
+                             'what would change')
+    lp_stats.add_arguments(parser)
+    lp_log.add_arguments(parser)
+    args = parser.parse_args(argv)
+    lp_log.setup('update_all', args)
+
+    listed = {}
+    rules = rulesets(listed)
+    checkpoint = None if args.dry_run else \
+        lp_checkpoint.Checkpoint('update_all', rules)
+    with lp_stats.reporting(args):
+        lp_bot.run(rules, catpages(lp_pages.get_site(), listed, checkpoint),
+                   pipeline=True, checkpoint=checkpoint, dry_run=args.dry_run)
+
+
+if __name__ == '__main__':
+    main()
@@ -7,160 +7,246 @@ DESCRIPTION:    Script for cleaning up League Cup pages on Pokémon Liquipedia.
 from datetime import date, datetime
 import re
 
-import pywikibot
-import pywikibot.pagegenerators
+import lp_bot
+import lp_log
+import lp_tables
+from lp_rules import Rule
+from lp_wikitext import replace_spans
 
-# Define the wiki site
-lpwiki = pywikibot.Site(code='pokemon', fam='liquipedia')
 
-
-# List all the pages to be edited
-def catpage(var=None):
-    if var is None:
-        return pywikibot.pagegenerators.CategorizedPageGenerator(
-            pywikibot.Category(lpwiki, 'Category:Weekly Tournaments'),
-            recurse=False, namespaces=[0], start='')  # , total=10)
-    else:
-        return [pywikibot.Page(lpwiki, "test")]
+# Category of the pages to be edited
+CATEGORY = 'Category:Weekly Tournaments'
 
 
-# Edit individual pages
-for page in catpage(None):
-    if page.title().partition('/')[0] == 'Rose Tower':
-        break
+# Remove end-of-line whitespace
+EOL_SPACE_RE = re.compile(' +\n')
 
-    edits = []
-    text = page.text
 
-    # Remove end-of-line whitespace
-    temp = re.sub('( *)\n', '\n', text)
+def remove_whitespace(text, ctx):
+    temp = EOL_SPACE_RE.sub('\n', text)
     if text != temp:
-        text = temp
-        edits.append('Removed end-of-line whitespaces')
-
-    # Look at list of templates
-    templates = pywikibot.textlib.extract_templates_and_params(page.text)
-    template_list = [item[0] for item in templates]
-
-    # Update Infobox league
-    if 'Infobox league' in template_list:
-        tempID = [i for i, x in enumerate(template_list)
-                  if x == 'Infobox league'][0]
-
-        name = re.search('\|name=(.*)\n', text)[1]
-        country = re.search('\|country=(.*)\n', text)[1]
-
-        if country in ['United States', 'Canada']:
-            citystate = re.search('League Cup - (.*) [0-9]{2}-[0-9]{2}'
-                                  '-[0-9]{4}', name)
-            if citystate is not None:
-                current_city = re.search('\|city=(.*)\n', text)
-                if re.search(current_city[1], citystate[1]) is not None:
-                    text = re.sub('\|city=(.*)\n', '|city={0}\n'.
-                                  format(citystate[1]), text)
-                    edits.append('Updated city with state')
-
-        # Remove shortname if equal to name
-        if name == re.search('\|shortname=(.*)\n', text)[1]:
-            text = re.sub('\|shortname=(.*)\n', '', text)
-            edits.append('Removed shortname')
-
-        # Remove tickername if equal to name
-        if name == re.search('\|tickername=(.*)\n', text)[1]:
-            text = re.sub('\|tickername=(.*)\n', '', text)
-            edits.append('Removed tickername')
-
-        # Update game played
-        text = re.sub('\|game=(.*)\n', '|game=TCG\n', text)
-        edits.append('Set game=TCG')
-
-        # Add circuit name
-        text = re.sub('(\|format=.*\n)(\|.*)', '\g<1>|series='
-                      'Pokémon League Cup\n\g<2>', text)
-        edits.append('Added series name')
-
-        # Update Liquipedia tier
-        text = re.sub('\|liquipediatier=(.*)Weekly(.*)\n',
-                      '|liquipediatier=3\n', text)
-        edits.append('Changed to Tier 3')
-
-    # Update sections
-    # section Tournament Details
-    text = re.sub('\n==Format==\n', '\n==Tournament Details==\n'
-                  '===Format===\n', text)
-    edits.append("Sectioned 'Tournament Details'")
-
-    # section Results
-    temp = re.sub('===Swiss Results===', '===Swiss Rounds Standings===', text)
-
-    if re.search('==Results==', text) is None:
-        temp = re.sub('===Masters Top 8===', '==Results==\n===Single '
-                      'Elimination Finals Bracket===', temp)
-
-    temp = re.sub('===?Results?===?\n\{\{Swiss', '==Results==\n===Swiss '
-                  'Rounds Standings===\n{{Swiss', temp)
+        return temp, ['Removed end-of-line whitespaces']
+    return text, []
+
+
+# The rules below only apply to pages with {{Infobox league}}. They read
+# and edit its fields through the parsed page instead of searching the
+# text for each field.
+def infobox(ctx, text):
+    '''The parsed page and its {{Infobox league}} (or None).'''
+    doc = ctx.doc(text)
+    return doc, doc.first('Infobox league')
+
+
+# Add the state to the city of North American events
+CITYSTATE_RE = re.compile('League Cup - (.*) [0-9]{2}-[0-9]{2}-[0-9]{4}')
+
+
+def update_city(text, ctx):
+    doc, info = infobox(ctx, text)
+    if info is None:
+        return text, []
+
+    name = info.get(text, 'name', '')
+    city = info.get(text, 'city')
+
+    if info.get(text, 'country') in ['United States', 'Canada']:
+        citystate = CITYSTATE_RE.search(name)
+        if citystate is not None and city is not None \
+                and city in citystate[1] and city != citystate[1]:
+            text = doc.set_value(info.param('city'), citystate[1])
+            return text, ['Updated city with state']
+    return text, []
+
+
+# Remove shortname if equal to name
+def remove_shortname(text, ctx):
+    doc, info = infobox(ctx, text)
+    if info is None or info.param('shortname') is None:
+        return text, []
+
+    if info.get(text, 'name') == info.get(text, 'shortname'):
+        text = doc.remove_param(info.param('shortname'))
+        return text, ['Removed shortname']
+    return text, []
+
+
+# Remove tickername if equal to name
+def remove_tickername(text, ctx):
+    doc, info = infobox(ctx, text)
+    if info is None or info.param('tickername') is None:
+        return text, []
+
+    if info.get(text, 'name') == info.get(text, 'tickername'):
+        text = doc.remove_param(info.param('tickername'))
+        return text, ['Removed tickername']
+    return text, []
+
+
+# Update game played
+def set_game(text, ctx):
+    doc, info = infobox(ctx, text)
+    if info is None or info.param('game') is None:
+        return text, []
+
+    if info.get(text, 'game') != 'TCG':
+        text = doc.set_value(info.param('game'), 'TCG')
+        return text, ['Set game=TCG']
+    return text, []
+
+
+# Add circuit name
+def add_series(text, ctx):
+    doc, info = infobox(ctx, text)
+    if info is None or info.param('series') is not None:
+        return text, []
+
+    param = info.param('format')
+    if param is not None:
+        text = doc.insert(param.end, '|series=Pokémon League Cup\n')
+        return text, ['Added series name']
+    return text, []
+
+
+# Update Liquipedia tier
+def set_tier(text, ctx):
+    doc, info = infobox(ctx, text)
+    if info is None:
+        return text, []
+
+    if 'Weekly' in info.get(text, 'liquipediatier', ''):
+        text = doc.set_value(info.param('liquipediatier'), '3')
+        return text, ['Changed to Tier 3']
+    return text, []
+
+
+# Update sections
+# section Tournament Details
+def section_details(text, ctx):
+    text = text.replace('\n==Format==\n', '\n==Tournament Details==\n'
+                        '===Format===\n')
+    return text, ["Sectioned 'Tournament Details'"]
+
+
+# section Results
+RESULTS_SWISS_RE = re.compile('===?Results?===?\n\{\{Swiss')
+
+
+def section_results(text, ctx):
+    temp = text.replace('===Swiss Results===', '===Swiss Rounds Standings===')
+
+    if '==Results==' not in text:
+        temp = temp.replace('===Masters Top 8===', '==Results==\n===Single '
+                            'Elimination Finals Bracket===')
+
+    temp = RESULTS_SWISS_RE.sub('==Results==\n===Swiss Rounds Standings==='
+                                '\n{{Swiss', temp)
 
     if temp != text:
-        text = temp
-        edits.append('Updated Results section headers')
-
-    # If there is no description, add a description
-    def description(loc_city, loc_full, date):
-        return "The '''{0} League Cup''' was a trading card game tournament "\
-               'held at {1} on {2}. The event was part of the Pokémon '\
-               'Championship Series where players earn Championship '\
-               'Points (CP) in order to qualify for the {{{{series|worlds|'\
-               'Pokémon World Championships}}}}.'.format(loc_city, loc_full,
-                                                          date)
-
-    title, loc, dd = page.title().split('/')
-    dd = date.fromisoformat(re.search('\|date=(.*)\n', text)[1])
-    country = re.search('\|country=(.*)\n', text)[1]
-    city = re.search('\|city=(.*)\n', text)[1]
+        return temp, ['Updated Results section headers']
+    return text, []
+
+
+# If there is no description, add a description
+def description(loc_city, loc_full, date):
+    return "The '''{0} League Cup''' was a trading card game tournament "\
+           'held at {1} on {2}. The event was part of the Pokémon '\
+           'Championship Series where players earn Championship '\
+           'Points (CP) in order to qualify for the {{{{series|worlds|'\
+           'Pokémon World Championships}}}}.'.format(loc_city, loc_full,
+                                                      date)
+
+
+DETAILS_RE = re.compile('(\}*\n*)(==Tournament Details==)')
+
+
+def add_description(text, ctx):
+    doc, info = infobox(ctx, text)
+    if info is None:
+        return text, []
+
+    title, loc, dd = ctx.title.split('/')
+    dd = date.fromisoformat(info.get(text, 'date'))
+    country = info.get(text, 'country')
+    city = info.get(text, 'city')
 
     if country in ['United States', 'Canada']:
         full_loc = '{0} of the {1}'.format(city, country)
     else:
         full_loc = '{0}, {1}'.format(city, country)
     desc = description(loc, full_loc, dd.strftime("%#d %B %Y"))
-    text = re.sub('(\}*\n*)(==Tournament Details==)', '\g<1>{0}\n\n\g<2>'.
-                  format(desc), text)
-    edits.append('Added description')
-
-    # Update Prize Pool entries
-    temp = re.sub('\|localcurrency=points', '|points=CP', text)
-    temp = re.sub('\|localprize=([0-9]{1,3})[^0-9^\|^\n]*([\|\n])',
-                  '|points=\g<1>\g<2>', temp)
-    temp = re.sub(' *([\|}}])', '\g<1>', temp)
-    if temp != text:
-        text = temp
-        edits.append('Updated prize pool templates')
-
-    # Update Swiss table/row
-    temp = re.sub('Swiss table/start\|rounds=0', 'Swiss table/start', text)
-    temp = re.sub('\|place=(.*)\|flag=(.*)\|(.*)\|win_m=(.*)\|lose_m=(.*)\|'
-                  'tie_m=(.*)\|opw%=([^%]*)%?\|oopw%=([^%]*)%?\}\}',
-                  '|\g<1>| |\g<2>|\g<3>|\g<4>|\g<5>|\g<6>|\g<7>|\g<8>}}', temp)
-    if temp != text:
-        text = temp
-        edits.append('Updated swiss standings table')
-
-    # Add reference section
-    if re.search('=References?=', text) is None:
+    text = DETAILS_RE.sub(lambda res: '{0}{1}\n\n{2}'.format(
+        res[1], desc, res[2]), text)
+    return text, ['Added description']
+
+
+# Update Prize Pool entries (see lp_tables.py)
+def update_prize_pool(text, ctx):
+    spans = lp_tables.prize_pool_spans(text)
+    if spans:
+        return replace_spans(text, spans), ['Updated prize pool templates']
+    return text, []
+
+
+# Update Swiss table/row to the positional form, checking the standings on
+# the way (see lp_tables.py)
+def update_swiss_table(text, ctx):
+    table = lp_tables.SwissTable(text)
+    bad = table.normalize()
+    # A value normalize() cannot read is usually invalid too, report it once
+    for i, problem in dict.fromkeys(bad + table.validate()):
+        lp_log.logger.warning('%s: Swiss row %s: %s', ctx.title,
+                              table.columns['place'][i].strip(), problem)
+    for offset, reason in table.skipped:
+        lp_log.logger.warning('%s: Swiss row on line %d left as is: %s',
+                              ctx.title, text.count('\n', 0, offset) + 1,
+                              reason)
+
+    spans = lp_tables.rounds_spans(text) + \
+        table.spans(skip={i for i, _ in bad})
+    if spans:
+        return replace_spans(text, spans), ['Updated swiss standings table']
+    return text, []
+
+
+# Add reference section
+def add_references(text, ctx):
+    doc = ctx.doc(text)
+    if not doc.has_section('References') and \
+            not doc.has_section('Reference'):
         text += '\n\n==References==\n{{Reflist}}'
-        edits.append('Appended reference section')
+        return text, ['Appended reference section']
+    return text, []
 
-    # Check if any changes to be made to the page
-    if text != page.text:
-        # Prepare changes to page
-        page.text = text
-        print(page.text)
 
-        # Generate edit summary
-        edit_summary = ', '.join(edits)
-        print("\n!! Edit summary:", edit_summary)
+RULES = [
+    Rule('whitespace', remove_whitespace, gate=' \n'),
+    Rule('city', update_city, gate='Infobox league'),
+    Rule('shortname', remove_shortname,
+         gate=('Infobox league', '|shortname=')),
+    Rule('tickername', remove_tickername,
+         gate=('Infobox league', '|tickername=')),
+    Rule('game', set_game, gate='Infobox league'),
+    Rule('series', add_series, gate='Infobox league'),
+    Rule('tier', set_tier, gate='Infobox league'),
+    Rule('section_details', section_details, gate='\n==Format==\n'),
+    Rule('section_results', section_results),
+    Rule('description', add_description),
+    Rule('prize_pool', update_prize_pool),
+    Rule('swiss_table', update_swiss_table, gate='Swiss table'),
+    Rule('references', add_references),
+    ]
 
-        # Save page with edit summary
-        page.save(edit_summary)
-    else:
-        print('No changes to {0}, page skipped'.format(page.title()))
+
+def before_rose_tower(page):
+    return page.title().partition('/')[0] != 'Rose Tower'
+
+
+def main(argv=None):
+    lp_bot.main('update_league_cup', CATEGORY, RULES, argv,
+                keep=before_rose_tower, watch=False,
+                description='Clean up League Cup pages.')
+
+
+if __name__ == '__main__':
+    main()
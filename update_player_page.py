@@ -6,208 +6,272 @@ DESCRIPTION:    Script for cleaning up player pages on Pokemon Liquipedia.
 '''
 import re
 
-import pywikibot
-import pywikibot.pagegenerators
+import lp_bot
+import lp_wikitext
+from lp_rules import Rule
 
-# Define the wiki site
-lpwiki = pywikibot.Site(code='pokemon', fam='liquipedia')
 
+# Category of the pages to be edited
+CATEGORY = 'Category:Players'
 
-# List all the pages to be edited
-def catpage(var=None):
-    if var is None:
-        return pywikibot.pagegenerators.CategorizedPageGenerator(
-            pywikibot.Category(lpwiki, 'Category:Players'),
-            recurse=False, namespaces=[0], start='')  # , total=10)
-    else:
-        return [pywikibot.Page(lpwiki, "test")]
 
+# Remove excessive newlines
+NEWLINES_RE = re.compile('\n(\s*)\n(\s*)')
 
-# Edit individual pages
-for page in catpage(None):
-    edits = []
-    text = page.text
 
-    # Remove excessive newlines
-    test, sbNL = re.subn('\n(\s*)\n(\s*)', '\n\n', text)
+def remove_newlines(text, ctx):
+    test, sbNL = NEWLINES_RE.subn('\n\n', text)
     if sbNL > 0 and test != text:
-        text = test
-        edits.append('Removed excess newlines')
-
-    # Remove template indentation
-    text, sbID1 = re.subn('\n\s\|', r'\n|', text)
-    text, sbID2 = re.subn('\n\s\}\}', r'\n}}', text)
-    text, sbID3 = re.subn('\n\s\{\{', r'\n{{', text)
-    if sbID1 + sbID2 + sbID3 > 0:
-        edits.append('Removed template indentation')
-
-    # Remove end-of-line whitespace
-    test, sbWS = re.subn('( *)\n', '\n', text)
-    if sbWS > 0 and test != text:
-        text = test
-        edits.append('Removed end-of-line whitespaces')
-
-    templates = pywikibot.textlib.extract_templates_and_params(page.text)
-    template_list = [item[0] for item in templates]
-
-    # Replace {{Tabs static}} with {{PlayerTabsHeader}}
-    if 'Tabs static' in template_list:
-        id_tabs = [i for i, x in enumerate(template_list)
-                   if x == 'Tabs static'][0]
-
-        # Determine if player is broadcaster and has a 3rd tab.
-        retabs = re.search('\|link3=(.*)', text)
-        if retabs:
-            # Check two conditions for tab to be replaced.
-            retabs_name = re.search('\|name3=(.*)', text)[1]
-            retabs_exist = pywikibot.Page(lpwiki, retabs[1]).exists()
-            if retabs_name == 'Broadcasts' and retabs_exist:
-                text = re.sub('\{\{Tabs static((.*)+\n){7,9}\}\}',
-                              r'{{PlayerTabsHeader|broadcaster=yes}}', text)
-                edits.append('Switched tabs to "PlayerTabsHeader" Template')
-            else:
-                text = re.sub('\{\{Tabs static((.*)+\n){7,9}\}\}',
-                              r'{{PlayerTabsHeader}}', text)
-                edits.append('Switched tabs to "PlayerTabsHeader" template')
-        else:
-            text = re.sub('\{\{Tabs static((.*)+\n){5,7}\}\}',
-                          r'{{PlayerTabsHeader}}', text)
-            edits.append('Switched tabs to "PlayerTabsHeader" template')
-
-    if 'Infobox player' in template_list:
-        idINFBX = [i for i, x in enumerate(template_list)
-                   if x == 'Infobox player'][0]
-        params_list = templates[idINFBX][1]
-
-        id_param = re.search('\|id=((.*)+)\n', text)
-
-        # Remove DISPLAYTITLE if entry is the same as id in {{Infobox player}}
-        try:
-            displaytitle = re.search('\{\{DISPLAYTITLE:((.*)+)\}\}', text)
-            test = displaytitle[1]
-        except TypeError:
-            pass
-        else:
-            if displaytitle[1] == id_param[1]:
-                text = re.sub('\{\{DISPLAYTITLE:((.*)+)\}\}\n', '', text)
-                edits.append('Removed DISPLAYTITLE')
-
-        # Identify the game played and add the field to the infobox
-        isvgc = re.search('mon VGC(.*)player', text)
-        istcg = re.search('mon TCG(.*)player', text)
-
-        games_played_exist = re.search('\|games_played=', text)
-        if not games_played_exist:
-            if isvgc and not istcg:
-                text = re.sub('(\|country=.*\n)(\|.*)',
-                              '\g<1>|games_played=VGC\n\g<2>', text)
-                edits.append('Set games_played=VGC')
-            elif istcg and not isvgc:
-                text = re.sub('(\|country=.*\n)(\|.*)',
-                              '\g<1>|games_played=TCG\n\g<2>', text)
-                edits.append('Set games_played=TCG')
-            elif istcg and isvgc:
-                text = re.sub('(\|country=.*\n)(\|.*)',
-                              '\g<1>|games_played=TCG, VGC\n\g<2>', text)
-                edits.append('Set games_played=TCG, VGC')
-            else:
-                text = re.sub('(\|country=.*\n)(\|.*)',
-                              '\g<1>|games_played=\n\g<2>', text)
-                edits.append('Added empty games_played field')
-
-        # Identify TCG player. Check if ID is two fragments (usually a name),
-        # then check if a substitution can be done.
-        idfrag = id_param[0].split(' ')
-        if len(idfrag) > 1:
-            text, tcgsubs = re.subn('(\[\[(.*?)Category(.*?)\]\]) player',
-                                    '\g<1> Pokémon TCG player', text)
-            if tcgsubs > 0:
-                edits.append('Identified TCG player')
-
-        # Bold Player ID/alias. First check if there exist a bolded
-        # name/alias, if not search the lead and bold it.
-        id_clean = re.sub(r'\s+$', '', id_param[1])    # Clean trailing spaces
-        if not re.compile("'''{0}'''".format(id_clean)).search(text):
-            text, boldsubs = re.subn('(\n[^\|](.*)){0}((.*) is a)'.
-                                     format(id_clean), "\g<1>'''{0}'''\g<3>".
-                                     format(id_clean), text)
-            if boldsubs > 0:
-                edits.append('Bold player name/alias')
-
-        # Remove URL prefixes in {{Infobox player}}.
-        # Goes through social media list and see if entries can be segmented.
-        # If it does, it most likely has a URL prefix.
-        social_prefix = {
-            'askfm':     'ask.fm',
-            'azubu':     'www.azubu.tv',
-            'douyu':     'www.douyu.com',
-            'facebook':  'facebook.com',
-            'gplus':     'plus.google.com',
-            'instagram': 'www.instagram.com',
-            'reddit':    'www.reddit.com/user',
-            'steam':     'steamcommunity.com/profiles',
-            'tencent':   't.qq.com',
-            'twitch':    'www.twitch.tv',
-            'twitter':   'twitter.com',
-            'vk':        'vk.com',
-            'weibo':     'weibo.com',
-            'youtube':   'www.youtube.com',
-            }
-
-        social_list = ['askfm', 'azubu', 'douyu', 'facebook', 'gplus',
-                       'instagram', 'reddit', 'steam', 'tencent', 'twitch',
-                       'twitter', 'vk', 'weibo', 'youtube']
-
-        flagURL = 0
-        for ii in social_list:
-            try:
-                test = params_list[ii]
-            except KeyError:
+        return test, ['Removed excess newlines']
+    return text, []
+
+
+# Remove template indentation
+INDENT_RE = re.compile('\n\s(?=\||\}\}|\{\{)')
+
+
+def remove_indentation(text, ctx):
+    text, sbID = INDENT_RE.subn('\n', text)
+    if sbID > 0:
+        return text, ['Removed template indentation']
+    return text, []
+
+
+# Remove end-of-line whitespace
+EOL_SPACE_RE = re.compile(' +\n')
+
+
+def remove_whitespace(text, ctx):
+    text, sbWS = EOL_SPACE_RE.subn('\n', text)
+    if sbWS > 0:
+        return text, ['Removed end-of-line whitespaces']
+    return text, []
+
+
+# Replace {{Tabs static}} with {{PlayerTabsHeader}}. Only templates with
+# the expected number of parameters (two or three tabs, plus up to two
+# extra parameters) are replaced.
+TABS_2_SIZES = range(4, 7)
+TABS_3_SIZES = range(6, 9)
+
+
+def replace_tabs(text, ctx):
+    doc = ctx.doc(text)
+    tabs = doc.templates_named('Tabs static')
+    if not tabs:
+        return text, []
+
+    # Determine if player is broadcaster and has a 3rd tab.
+    header = '{{PlayerTabsHeader}}'
+    summary = 'Switched tabs to "PlayerTabsHeader" template'
+    sizes = TABS_2_SIZES
+
+    link3 = tabs[0].param('link3')
+    if link3 is not None:
+        sizes = TABS_3_SIZES
+        # Check two conditions for tab to be replaced.
+        name3 = tabs[0].param('name3')
+        if name3 is not None and name3.value(text).strip() == 'Broadcasts' \
+                and ctx.exists(link3.value(text).strip()):
+            header = '{{PlayerTabsHeader|broadcaster=yes}}'
+            summary = 'Switched tabs to "PlayerTabsHeader" Template'
+
+    spans = [(template.start, template.end, header) for template in tabs
+             if len(template.params) in sizes]
+    if spans:
+        return doc.replace(spans), [summary]
+    return text, []
+
+
+def broadcasts_tab(text, ctx):
+    '''The Broadcasts tab target that replace_tabs checks, if any.'''
+    tabs = ctx.doc(text).templates_named('Tabs static')
+    if tabs and tabs[0].param('link3') is not None \
+            and tabs[0].get(text, 'name3') == 'Broadcasts':
+        return [tabs[0].get(text, 'link3')]
+    return []
+
+
+# The rules below only apply to pages with {{Infobox player}}
+def infobox_id(doc):
+    '''The id field of {{Infobox player}}, or None.'''
+    infobox = doc.first('Infobox player')
+    if infobox is None:
+        return None
+    return infobox.get(doc.text, 'id')
+
+
+# Remove DISPLAYTITLE if entry is the same as id in {{Infobox player}}
+def remove_displaytitle(text, ctx):
+    doc = ctx.doc(text)
+    player_id = infobox_id(doc)
+    titles = doc.templates_named('DISPLAYTITLE')
+    if player_id is None or not titles:
+        return text, []
+
+    if titles[0].name.partition(':')[2].strip() == player_id:
+        # Remove the template together with the newline after it
+        spans = [(template.start,
+                  lp_wikitext.after_newline(text, template.end), '')
+                 for template in titles]
+        return doc.replace(spans), ['Removed DISPLAYTITLE']
+    return text, []
+
+
+# Identify the game played and add the field to the infobox
+VGC_RE = re.compile('mon VGC(.*)player')
+TCG_RE = re.compile('mon TCG(.*)player')
+
+
+def add_games_played(text, ctx):
+    doc = ctx.doc(text)
+    infobox = doc.first('Infobox player')
+    if infobox is None or infobox.param('games_played') is not None:
+        return text, []
+    country = infobox.param('country')
+    if country is None:
+        return text, []
+
+    isvgc = VGC_RE.search(text)
+    istcg = TCG_RE.search(text)
+
+    if isvgc and not istcg:
+        games, summary = 'VGC', 'Set games_played=VGC'
+    elif istcg and not isvgc:
+        games, summary = 'TCG', 'Set games_played=TCG'
+    elif istcg and isvgc:
+        games, summary = 'TCG, VGC', 'Set games_played=TCG, VGC'
+    else:
+        games, summary = '', 'Added empty games_played field'
+    text = doc.insert(country.end, '|games_played={0}\n'.format(games))
+    return text, [summary]
+
+
+# Identify TCG player. Check if ID is two fragments (usually a name),
+# then check if a substitution can be done.
+CATEGORY_PLAYER_RE = re.compile('(\[\[(.*?)Category(.*?)\]\]) player')
+
+
+def identify_tcg_player(text, ctx):
+    player_id = infobox_id(ctx.doc(text))
+    if player_id is not None and len(player_id.split(' ')) > 1:
+        text, tcgsubs = CATEGORY_PLAYER_RE.subn('\g<1> Pokémon TCG player',
+                                                text)
+        if tcgsubs > 0:
+            return text, ['Identified TCG player']
+    return text, []
+
+
+# Bold Player ID/alias. First check if there exist a bolded
+# name/alias, if not search the lead and bold it.
+def bold_id(text, ctx):
+    id_clean = infobox_id(ctx.doc(text))
+    if not id_clean or ' is a' not in text:
+        return text, []
+    if "'''{0}'''".format(id_clean) in text:
+        return text, []
+
+    # The only pattern that depends on the page, compiled once per page
+    lead = re.compile('(\n[^\|](.*)){0}((.*) is a)'.format(
+        re.escape(id_clean)))
+    text, boldsubs = lead.subn("\g<1>'''{0}'''\g<3>".format(
+        id_clean.replace('\\', r'\\')), text)
+    if boldsubs > 0:
+        return text, ['Bold player name/alias']
+    return text, []
+
+
+# Remove URL prefixes in {{Infobox player}}.
+# Goes through social media list and see if entries can be segmented.
+# If it does, it most likely has a URL prefix.
+social_prefix = {
+    'askfm':     'ask.fm',
+    'azubu':     'www.azubu.tv',
+    'douyu':     'www.douyu.com',
+    'facebook':  'facebook.com',
+    'gplus':     'plus.google.com',
+    'instagram': 'www.instagram.com',
+    'reddit':    'www.reddit.com/user',
+    'steam':     'steamcommunity.com/profiles',
+    'tencent':   't.qq.com',
+    'twitch':    'www.twitch.tv',
+    'twitter':   'twitter.com',
+    'vk':        'vk.com',
+    'weibo':     'weibo.com',
+    'youtube':   'www.youtube.com',
+    }
+
+social_list = ['askfm', 'azubu', 'douyu', 'facebook', 'gplus',
+               'instagram', 'reddit', 'steam', 'tencent', 'twitch',
+               'twitter', 'vk', 'weibo', 'youtube']
+
+
+def remove_url_prefix(text, ctx):
+    doc = ctx.doc(text)
+    infobox = doc.first('Infobox player')
+    if infobox is None:
+        return text, []
+
+    # The infobox parameters are already split, so every social media
+    # field is visited once without searching the page for it
+    spans = []
+    for param in infobox.params:
+        if param.name not in social_list:
+            continue
+        value = param.value(text).rstrip()
+        frag = value.split('/')
+
+        if len(frag) > 1:
+            # Special case for youtube where "channel/someID" is
+            # required to direct to the user page
+            if param.name == 'youtube' and frag[0].strip() in ['channel']:
                 pass
             else:
-                res = re.compile('(\|{0}=)((.*)+)'.format(ii)).search(text)
-                frag = res[2].split('/')
-
-                if len(frag) > 1:
-                    # Special case for youtube where "channel/someID" is
-                    # required to direct to the user page
-                    if ii == 'youtube' and frag[0] in ['channel']:
-                        pass
-                    else:
-                        text = re.sub('(\|{0}=)((.*)+)'.format(ii),
-                                      res[1] + frag[-1], text)
-                        if flagURL == 0:
-                            edits.append('Removed social media URL prefix')
-                            flagURL += 1
-
-    # Add reference section if missing
-    flagref0 = pywikibot.textlib.does_text_contain_section(
-                    page.text, "References"
-               )
-    flagref1 = pywikibot.textlib.does_text_contain_section(
-                    page.text, "Reference"
-               )
+                spans.append((param.value_start,
+                              param.value_start + len(value), frag[-1]))
+
+    if spans:
+        return doc.replace(spans), ['Removed social media URL prefix']
+    return text, []
+
+
+# Add reference section if missing
+def add_references(text, ctx):
+    doc = ctx.doc(text)
+    flagref0 = doc.has_section('References')
+    flagref1 = doc.has_section('Reference')
     if not flagref0:
         # If there is completely no reference section
         if not flagref1:
             text += "\n\n==References== \n{{Reflist}}"
-            edits.append('Added reference section')
+            return text, ['Added reference section']
         # If there is section labelled 'Reference' without "s"
         else:
-            text = re.sub('==Reference==', '==References==', text)
-            edits.append('Update References')
+            text = text.replace('==Reference==', '==References==')
+            return text, ['Update References']
+    return text, []
 
-    # Check if any changes to be made to the page
-    if text != page.text:
-        # Prepare changes to page
-        page.text = text
-        print(page.text)
 
-        # Generate edit summary
-        edit_summary = ', '.join(edits)
-        print("\n!! Edit summary:", edit_summary)
+RULES = [
+    Rule('newlines', remove_newlines),
+    Rule('indentation', remove_indentation),
+    Rule('whitespace', remove_whitespace, gate=' \n'),
+    Rule('tabs', replace_tabs, gate='Tabs static', prefetch=broadcasts_tab),
+    Rule('displaytitle', remove_displaytitle,
+         gate=('Infobox player', 'DISPLAYTITLE')),
+    Rule('games_played', add_games_played, gate='Infobox player'),
+    Rule('tcg_player', identify_tcg_player,
+         gate=('Infobox player', 'Category')),
+    Rule('bold_id', bold_id, gate='Infobox player'),
+    Rule('url_prefix', remove_url_prefix, gate=('Infobox player', '/')),
+    Rule('references', add_references),
+    ]
 
-        # Save page with edit summary
-        page.save(edit_summary)
-    else:
-        print('No changes to {0}, page skipped'.format(page.title()))
+
+def main(argv=None):
+    lp_bot.main('update_player_page', CATEGORY, RULES, argv,
+                description='Clean up player pages.')
+
+
+if __name__ == '__main__':
+    main()
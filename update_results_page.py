@@ -7,103 +7,139 @@ DESCRIPTION:    Script for cleaning up player result pages on Pokemon
 '''
 import re
 
-import pywikibot
-import pywikibot.pagegenerators
+import lp_bot
+import lp_wikitext
+from lp_rules import Rule
 
-# Define the wiki site
-lpwiki = pywikibot.Site(code='pokemon', fam='liquipedia')
 
+# Category of the pages to be edited
+CATEGORY = 'Category:Player Results pages'
 
-# List all the pages to be edited
-def catpage(var=None):
-    if var is None:
-        return pywikibot.pagegenerators.CategorizedPageGenerator(
-            pywikibot.Category(lpwiki, 'Category:Player Results pages'),
-            recurse=False, namespaces=[0], start='')  # total=10)
-    else:
-        return [pywikibot.Page(lpwiki, "test")]
 
+# Remove excessive newlines
+NEWLINES_1_RE = re.compile('\n\n\s')
+NEWLINES_2_RE = re.compile('\n\n\n')
 
-# Edit individual pages
-for page in catpage(None):
-    edits = []
-    text = page.text
 
-    # Remove excessive newlines
-    text, sbNL1 = re.subn('\n\n\s', '\n', text)
-    text, sbNL2 = re.subn('\n\n\n', '\n\n', text)
+def remove_newlines(text, ctx):
+    text, sbNL1 = NEWLINES_1_RE.subn('\n', text)
+    text, sbNL2 = NEWLINES_2_RE.subn('\n\n', text)
     if sbNL1 + sbNL2 > 0:
-        edits.append('Removed excessive newline skips')
+        return text, ['Removed excessive newline skips']
+    return text, []
+
+
+# Remove template indentation
+INDENT_RE = re.compile('\n\s(?=\||\}\}|\{\{)')
+
+
+def remove_indentation(text, ctx):
+    text, sbID = INDENT_RE.subn('\n', text)
+    if sbID > 0:
+        return text, ['Removed template indentation']
+    return text, []
+
 
-    # Remove template indentation
-    text, sbID1 = re.subn('\n\s\|', r'\n|', text)
-    text, sbID2 = re.subn('\n\s\}\}', r'\n}}', text)
-    text, sbID3 = re.subn('\n\s\{\{', r'\n{{', text)
-    if sbID1 + sbID2 + sbID3 > 0:
-        edits.append('Removed template indentation')
+# Remove end-of-line whitespace
+EOL_SPACE_RE = re.compile('\s\n')
 
-    # Remove end-of-line whitespace
-    text, sbWS = re.subn('\s\n', '\n', text)
+
+def remove_whitespace(text, ctx):
+    text, sbWS = EOL_SPACE_RE.subn('\n', text)
     if sbWS > 0:
-        edits.append('Removed end-of-line whitespaces')
-
-    # Look at list of templates
-    templates = pywikibot.textlib.extract_templates_and_params(page.text)
-    template_list = [item[0] for item in templates]
-
-    # Replace {{Tabs static}} with {{PlayerTabsHeader}}
-    if 'Tabs static' in template_list:
-        id_tabs = [i for i, x in enumerate(template_list)
-                   if x == 'Tabs static'][0]
-
-        # Determine if player is broadcaster
-        pagename = page.title().split('/')[0]
-        page_bc = pywikibot.Page(lpwiki, "{0}/Broadcasts".format(pagename))
-
-        if page_bc.exists():
-            text = re.sub('\{\{Tabs static((.*)+\n){6,8}\}\}',
-                          r'{{PlayerTabsHeader|broadcaster=yes}}', text)
-            edits.append('Switched tabs to "PlayerTabsHeader" Template')
-        else:
-            text = re.sub('\{\{Tabs static((.*)+\n){5,7}\}\}',
-                          r'{{PlayerTabsHeader}}', text)
-            edits.append('Switched tabs to "PlayerTabsHeader" template')
-
-    # Move DISPLAYTITLE to the top of the page
-    try:
-        displaytitle = re.search('\{\{DISPLAYTITLE:((.*)+)\}\}', text)
-        test = displaytitle[1]
-    except TypeError:
-        pass
+        return text, ['Removed end-of-line whitespaces']
+    return text, []
+
+
+# Replace {{Tabs static}} with {{PlayerTabsHeader}}. Only templates with
+# the expected number of parameters (two or three tabs, plus up to two
+# extra parameters) are replaced.
+TABS_2_SIZES = range(4, 7)
+TABS_3_SIZES = range(5, 8)
+
+
+def broadcasts_page(text, ctx):
+    '''The Broadcasts subpage that replace_tabs checks.'''
+    pagename = ctx.title.split('/')[0]
+    return ["{0}/Broadcasts".format(pagename)]
+
+
+def replace_tabs(text, ctx):
+    doc = ctx.doc(text)
+    tabs = doc.templates_named('Tabs static')
+    if not tabs:
+        return text, []
+
+    # Determine if player is broadcaster
+    if ctx.exists(broadcasts_page(text, ctx)[0]):
+        header = '{{PlayerTabsHeader|broadcaster=yes}}'
+        summary = 'Switched tabs to "PlayerTabsHeader" Template'
+        sizes = TABS_3_SIZES
     else:
-        temp, sbDIS = re.subn('\{\{DISPLAYTITLE:((.*)+)\}\}\n', '', text)
-        temp = displaytitle[0] + '\n' + temp
+        header = '{{PlayerTabsHeader}}'
+        summary = 'Switched tabs to "PlayerTabsHeader" template'
+        sizes = TABS_2_SIZES
+
+    spans = [(template.start, template.end, header) for template in tabs
+             if len(template.params) in sizes]
+    if spans:
+        return doc.replace(spans), [summary]
+    return text, []
+
+
+# Move DISPLAYTITLE to the top of the page
+def move_displaytitle(text, ctx):
+    doc = ctx.doc(text)
+    titles = doc.templates_named('DISPLAYTITLE')
+    if titles:
+        first = text[titles[0].start:titles[0].end]
+        spans = [(template.start,
+                  lp_wikitext.after_newline(text, template.end), '')
+                 for template in titles]
+        temp = first + '\n' + lp_wikitext.replace_spans(text, spans)
         if temp != text:
-            text = temp
-            edits.append('Moved DISPLAYTITLE to top')
+            return temp, ['Moved DISPLAYTITLE to top']
+    return text, []
+
+
+# Remove __NOTOC__
+NOTOC_RE = re.compile('(\n*)__NOTOC__(\n*)')
+
+
+def remove_notoc(text, ctx):
+    text, sbTOC = NOTOC_RE.subn('\n\n', text)
+    if sbTOC > 0:
+        return text, ['Removed __NOTOC__']
+    return text, []
 
-    # Remove __NOTOC__
-    if re.search('__NOTOC__', text) is not None:
-        text, sbTOC = re.subn('(\n*)__NOTOC__(\n*)', '\n\n', text)
-        if sbTOC > 0:
-            edits.append('Removed __NOTOC__')
 
-    # Add newline between templates and section header
-    text, sbNEW = re.subn('([\}_])(\n==Detailed)', '\g<1>\n\g<2>', text)
+# Add newline between templates and section header
+HEADER_RE = re.compile('([\}_])(\n==Detailed)')
+
+
+def add_header_newline(text, ctx):
+    text, sbNEW = HEADER_RE.subn('\g<1>\n\g<2>', text)
     if sbNEW > 0:
-        edits.append('Added newline before section header')
+        return text, ['Added newline before section header']
+    return text, []
 
-    # Check if any changes to be made to the page
-    if text != page.text:
-        # Prepare changes to page
-        page.text = text
-        print(page.text)
 
-        # Generate edit summary
-        edit_summary = ', '.join(edits)
-        print("\n!! Edit summary:", edit_summary)
+RULES = [
+    Rule('newlines', remove_newlines, gate='\n\n'),
+    Rule('indentation', remove_indentation),
+    Rule('whitespace', remove_whitespace),
+    Rule('tabs', replace_tabs, gate='Tabs static',
+         prefetch=broadcasts_page),
+    Rule('displaytitle', move_displaytitle, gate='DISPLAYTITLE'),
+    Rule('notoc', remove_notoc, gate='__NOTOC__'),
+    Rule('header_newline', add_header_newline, gate='\n==Detailed'),
+    ]
 
-        # Save page with edit summary
-        page.save(edit_summary)
-    else:
-        print('No changes to {0}, page skipped'.format(page.title()))
+
+def main(argv=None):
+    lp_bot.main('update_results_page', CATEGORY, RULES, argv,
+                description='Clean up player results pages.')
+
+
+if __name__ == '__main__':
+    main()
@@ -4,51 +4,112 @@ AUTHOR:         AquaDragon
 DATE:           19 Jun 2021
 DESCRIPTION:    Script for uploading Pokémon sprites to Liquipedia commons.
 '''
-import pywikibot
-import pywikibot.pagegenerators
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import os
 
-import subprocess
-
-# Define the wiki site
-lpwiki = pywikibot.Site(code='commons', fam='liquipedia')
-
-ii = 0
+import lp_pages
+import lp_throttle
+from lp_lazy import pywikibot
 
 # List of sprites to upload
-f = open('./scripts/userscripts/uploadlist.txt', 'r')
+UPLOAD_LIST = './scripts/userscripts/uploadlist.txt'
 
-for mon in f.read().splitlines():
-    # if ii == 50:
-    #     break
+# Sprite source, and where the sprites are in a checkout of the repo
+SOURCE = 'https://raw.githubusercontent.com/msikma/pokesprite/master/'\
+         'pokemon-gen8/regular/'
+SOURCE_DIR = os.path.join('pokemon-gen8', 'regular')
 
-    # Sprite source filename
-    prefix = "https://raw.githubusercontent.com/msikma/pokesprite/master/"\
-             "pokemon-gen8/regular/"
-    sourcefname = prefix + mon + '.png'
 
+def filename(mon):
     # Naming scheme on Liquipedia
-    fname = 'pkmn-' + mon + '.png'
-
-    descfile = "== Summary ==\n{{{{FileInfo\n|featured=\n|featured2=\n"\
-               "|description=A Pokémon sprite of {0}\n"\
-               "|license=fairuse\n|game=pokemon\n|event=\n|date=\n"\
-               "|author=Pokémon\n"\
-               "|copyright=Nintendo / Creatures Inc. / GAME FREAK Inc.\n"\
-               "|note=\n"\
-               "|source=Sprites are sourced from the PokéSprite project, a"\
-               " database for Pokémon sprites."\
-               " (https://msikma.github.io/pokesprite/)\n"\
-               "}}}}\n\n[[Category:Pokémon sprites]]".format(
-                    mon.replace('-', ' ').title())
-
-    # Check if page already exists on wiki so we don't have to wait
-    page = pywikibot.Page(lpwiki, 'File:{0}'.format(fname))
-
-    if not page.exists():
-        subprocess.call(['py', 'pwb.py', './scripts/upload.py',
-                         '-filename:{0}'.format(fname), sourcefname, descfile,
-                         '-abortonwarn', '-ignorewarn', '-always'])
-
-    ii += 1
-
-f.close()
+    return 'pkmn-' + mon + '.png'
+
+
+def description(mon):
+    return "== Summary ==\n{{{{FileInfo\n|featured=\n|featured2=\n"\
+           "|description=A Pokémon sprite of {0}\n"\
+           "|license=fairuse\n|game=pokemon\n|event=\n|date=\n"\
+           "|author=Pokémon\n"\
+           "|copyright=Nintendo / Creatures Inc. / GAME FREAK Inc.\n"\
+           "|note=\n"\
+           "|source=Sprites are sourced from the PokéSprite project, a"\
+           " database for Pokémon sprites."\
+           " (https://msikma.github.io/pokesprite/)\n"\
+           "}}}}\n\n[[Category:Pokémon sprites]]".format(
+                mon.replace('-', ' ').title())
+
+
+def sha1(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def upload(site, mon, source, update=False):
+    '''Upload the sprite of mon from source, a URL or local file. Return an
+    error message or None.'''
+    page = pywikibot.FilePage(site, 'File:{0}'.format(filename(mon)))
+    comment = 'Updating Pokémon sprite' if update \
+        else 'Uploading Pokémon sprite'
+    try:
+        # The commons write lane (see lp_throttle.py) paces the uploads
+        # and decides how many run at once
+        with lp_throttle.write(site, 'upload'):
+            page.upload(source, text=description(mon), comment=comment,
+                        ignore_warnings=True, report_success=False)
+    except Exception as err:
+        return str(err)
+    return None
+
+
+def upload_all(site, mons, checkout=None):
+    '''Upload the sprites missing from the wiki. With checkout, a local
+    clone of the PokéSprite repo, sprites are uploaded from disk and
+    existing files whose SHA-1 differs from the local one are replaced.'''
+    # Look up every file on the wiki at once instead of one request per
+    # sprite
+    titles = {mon: 'File:{0}'.format(filename(mon)) for mon in mons}
+    hashes = lp_pages.file_hashes(site, list(titles.values()))
+
+    todo = []
+    for mon in mons:
+        wiki = hashes[titles[mon]]
+        if checkout is None:
+            if wiki is None:
+                todo.append((mon, SOURCE + mon + '.png', False))
+            continue
+        path = os.path.join(checkout, SOURCE_DIR, mon + '.png')
+        if not os.path.exists(path):
+            print('No sprite for {0} in {1}'.format(mon, checkout))
+        elif wiki != sha1(path):
+            todo.append((mon, path, wiki is not None))
+    print('!! {0} of {1} sprites to upload'.format(len(todo), len(mons)))
+
+    workers = lp_throttle.get(site).write.max_workers
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        errors = pool.map(lambda job: upload(site, *job), todo)
+        failed = [(mon, err) for (mon, _, _), err in zip(todo, errors)
+                  if err is not None]
+
+    print('\n!! Uploaded {0} sprites, {1} failed'.format(
+        len(todo) - len(failed), len(failed)))
+    for mon, err in failed:
+        print('   {0}: {1}'.format(filename(mon), err))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Upload Pokémon sprites to Liquipedia commons.')
+    parser.add_argument('--checkout', metavar='PATH',
+                        help='local clone of msikma/pokesprite; only new or '
+                             'changed sprites are uploaded, from disk')
+    args = parser.parse_args(argv)
+
+    with open(UPLOAD_LIST, 'r') as f:
+        mons = [mon for mon in f.read().splitlines() if mon]
+    upload_all(lp_pages.get_site(code='commons'), mons, args.checkout)
+
+
+if __name__ == '__main__':
+    main()